@@ -7,6 +7,7 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import io
 import logging
+import asyncio
 from datetime import datetime, timedelta
 import re
 
@@ -34,7 +35,10 @@ class CodeEditor(commands.Cog):
     def __init__(self, bot, get_db_connection_func):
         self.bot = bot
         self.get_db_connection = get_db_connection_func
-        self.init_db_tables()
+
+    async def cog_load(self):
+        """Create tables off the event loop once the cog is added"""
+        await asyncio.to_thread(self.init_db_tables)
     
     def init_db_tables(self):
         try:
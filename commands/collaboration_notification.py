@@ -3,7 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
 import logging
-from typing import Optional
+from typing import Optional, Literal
 
 logger = logging.getLogger(__name__)
 
@@ -46,18 +46,18 @@ class TeamCollaboration(commands.Cog):
 
     @commands.hybrid_command(name="notify_mute", description="Mute specific notification type")
     @app_commands.describe(notification_type="Type to mute (task/meeting/reminder)")
-    async def notify_mute(self, ctx: commands.Context, notification_type: str):
+    async def notify_mute(self, ctx: commands.Context, notification_type: Literal['task', 'meeting', 'reminder']):
         # Store muted types in memory or DB (simple example)
         muted = self.notification_settings.setdefault('muted', set())
-        muted.add(notification_type.lower())
+        muted.add(notification_type)
         await ctx.send(f"🔕 Muted notifications of type: {notification_type}")
 
     @commands.hybrid_command(name="notify_unmute", description="Unmute specific notification type")
     @app_commands.describe(notification_type="Type to unmute")
-    async def notify_unmute(self, ctx: commands.Context, notification_type: str):
+    async def notify_unmute(self, ctx: commands.Context, notification_type: Literal['task', 'meeting', 'reminder']):
         muted = self.notification_settings.setdefault('muted', set())
-        if notification_type.lower() in muted:
-            muted.remove(notification_type.lower())
+        if notification_type in muted:
+            muted.remove(notification_type)
             await ctx.send(f"🔔 Unmuted notifications of type: {notification_type}")
         else:
             await ctx.send(f"ℹ️ Notification type {notification_type} is not muted.")
@@ -89,8 +89,11 @@ class TeamCollaboration(commands.Cog):
                     await ctx.send("❌ Database unavailable.")
                     return
                 with conn.cursor() as cur:
+                    # Embeds hold at most 25 fields; show the most recent updates
                     cur.execute("""
-                        SELECT user_id, status_message, updated_at FROM user_status WHERE guild_id = %s
+                        SELECT user_id, status_message, updated_at, COUNT(*) OVER ()
+                        FROM user_status WHERE guild_id = %s
+                        ORDER BY updated_at DESC LIMIT 25
                     """, (ctx.guild.id,))
                     rows = cur.fetchall()
             if not rows:
@@ -100,10 +103,13 @@ class TeamCollaboration(commands.Cog):
                 title=f"👥 Team Statuses for {ctx.guild.name}",
                 color=discord.Color.blue()
             )
-            for user_id, status_msg, updated_at in rows:
+            for user_id, status_msg, updated_at, _ in rows:
                 user = self.bot.get_user(user_id)
                 name = user.display_name if user else f"User {user_id}"
                 embed.add_field(name=name, value=f"{status_msg} (updated {updated_at.strftime('%Y-%m-%d %H:%M')})", inline=False)
+            total = rows[0][3]
+            if total > len(rows):
+                embed.set_footer(text=f"Showing the {len(rows)} most recent of {total} statuses")
             await ctx.send(embed=embed)
         except Exception as e:
             logger.error(f"status_team error: {e}")
@@ -103,8 +103,9 @@ class Gamification(commands.Cog):
                     return
                 with conn.cursor() as cur:
                     cur.execute("""
-                        SELECT badge_name, date_earned FROM user_badges
+                        SELECT badge_name, date_earned, COUNT(*) OVER () FROM user_badges
                         WHERE user_id = %s AND guild_id = %s
+                        ORDER BY date_earned DESC LIMIT 25
                     """, (target.id, ctx.guild.id))
                     rows = cur.fetchall()
             
@@ -116,8 +117,10 @@ class Gamification(commands.Cog):
                 title=f"🏅 Badges for {target.display_name}",
                 color=discord.Color.purple()
             )
-            for badge_name, date_earned in rows:
+            for badge_name, date_earned, _ in rows:
                 embed.add_field(name=badge_name, value=date_earned.strftime("%Y-%m-%d"), inline=True)
+            if rows[0][2] > len(rows):
+                embed.set_footer(text=f"Showing the {len(rows)} latest of {rows[0][2]} badges")
 
             await ctx.send(embed=embed)
         except Exception as e:
@@ -155,7 +158,9 @@ class Gamification(commands.Cog):
                     return
                 with conn.cursor() as cur:
                     cur.execute("""
-                        SELECT challenge_id, title, xp_reward FROM challenges WHERE guild_id = %s
+                        SELECT challenge_id, title, xp_reward, COUNT(*) OVER ()
+                        FROM challenges WHERE guild_id = %s
+                        ORDER BY created_at DESC LIMIT 25
                     """, (ctx.guild.id,))
                     rows = cur.fetchall()
             if not rows:
@@ -165,8 +170,10 @@ class Gamification(commands.Cog):
                 title="📝 Active Challenges",
                 color=discord.Color.teal()
             )
-            for cid, title, xp_reward in rows:
+            for cid, title, xp_reward, _ in rows:
                 embed.add_field(name=f"{cid}: {title}", value=f"Reward: {xp_reward} XP", inline=False)
+            if rows[0][3] > len(rows):
+                embed.set_footer(text=f"Showing the {len(rows)} newest of {rows[0][3]} challenges")
             await ctx.send(embed=embed)
         except Exception as e:
             logger.error(f"challenge_list error: {e}")
@@ -183,26 +190,33 @@ class Gamification(commands.Cog):
                     await ctx.send("❌ Database unavailable.")
                     return
                 with conn.cursor() as cur:
-                    cur.execute("SELECT xp_reward FROM challenges WHERE challenge_id = %s AND guild_id = %s", (challenge_id, guild_id))
-                    row = cur.fetchone()
-                    if not row:
-                        await ctx.send("❌ Challenge not found.")
-                        return
-                    xp_reward = row[0]
-                    # Record completion and add XP; Simplified logic here
-                    cur.execute("""
-                        INSERT INTO completed_challenges (user_id, challenge_id, guild_id, completed_at)
-                        VALUES (%s, %s, %s, NOW())
-                        ON CONFLICT DO NOTHING
-                    """, (user_id, challenge_id, guild_id))
-                    # Update user XP / level
+                    # Look up, record and reward in one round trip; XP is only added
+                    # when the completion row is new, so repeats earn nothing
                     cur.execute("""
-                        INSERT INTO user_xp_levels (user_id, guild_id, xp, level)
-                        VALUES (%s, %s, %s, 1)
-                        ON CONFLICT (user_id, guild_id)
-                        DO UPDATE SET xp = user_xp_levels.xp + %s 
-                    """, (user_id, guild_id, xp_reward, xp_reward))
+                        WITH challenge AS (
+                            SELECT xp_reward FROM challenges WHERE challenge_id = %s AND guild_id = %s
+                        ), completed AS (
+                            INSERT INTO completed_challenges (user_id, challenge_id, guild_id, completed_at)
+                            SELECT %s, %s, %s, NOW() FROM challenge
+                            ON CONFLICT DO NOTHING
+                            RETURNING 1
+                        ), rewarded AS (
+                            INSERT INTO user_xp_levels (user_id, guild_id, xp, level)
+                            SELECT %s, %s, xp_reward, 1 FROM challenge, completed
+                            ON CONFLICT (user_id, guild_id)
+                            DO UPDATE SET xp = user_xp_levels.xp + EXCLUDED.xp
+                        )
+                        SELECT xp_reward, EXISTS (SELECT 1 FROM completed) FROM challenge
+                    """, (challenge_id, guild_id, user_id, challenge_id, guild_id, user_id, guild_id))
+                    row = cur.fetchone()
                     conn.commit()
+            if not row:
+                await ctx.send("❌ Challenge not found.")
+                return
+            xp_reward, newly_completed = row
+            if not newly_completed:
+                await ctx.send(f"ℹ️ You have already completed challenge `{challenge_id}`.")
+                return
             await ctx.send(f"✅ Challenge `{challenge_id}` completed! You earned {xp_reward} XP.")
         except Exception as e:
             logger.error(f"challenge_complete error: {e}")
@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
 import logging
+import asyncio
 from typing import Optional, Literal
 
 logger = logging.getLogger(__name__)
@@ -13,7 +14,10 @@ class Meetings(commands.Cog):
         self.get_db_connection = get_db_connection_func
         self.meetings = {}
         self.events = {}
-        self.init_db_tables()
+
+    async def cog_load(self):
+        """Create tables off the event loop once the cog is added"""
+        await asyncio.to_thread(self.init_db_tables)
 
     def init_db_tables(self):
         """Initialize meetings and events tables"""
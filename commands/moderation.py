@@ -1,13 +1,49 @@
 import discord
 from discord.ext import commands
-from datetime import datetime, timedelta
-import asyncio
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, deque
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Discord caps embeds at 25 fields, so only the latest 25 warnings are kept
+MAX_WARNINGS = 25
+# Hard cap on /clear, deleted in bulk-delete sized chunks
+MAX_CLEAR = 1000
+PURGE_CHUNK = 100
+# How long a fetched guild ban list is reused by /unban
+BANS_CACHE_TTL = 30
+# How long a computed role member count is reused by /role-info
+ROLE_COUNT_TTL = 60
 
 class Moderation(commands.Cog):
+    # Static embed skeletons (Discord JSON form); only title and field values change per call
+    _USER_INFO_TEMPLATE = {
+        "type": "rich",
+        "color": 0x3498db,
+        "fields": [
+            {"name": "Joined Server", "value": "", "inline": True},
+            {"name": "Account Created", "value": "", "inline": True},
+            {"name": "Roles", "value": "", "inline": True},
+        ],
+    }
+    _SERVER_INFO_TEMPLATE = {
+        "type": "rich",
+        "color": 0x2ecc71,
+        "fields": [
+            {"name": "Owner", "value": "", "inline": True},
+            {"name": "Members", "value": "", "inline": True},
+            {"name": "Created", "value": "", "inline": True},
+        ],
+    }
+
     def __init__(self, bot):
         self.bot = bot
         self.muted_users = {}
-        self.user_warnings = {}
+        self.user_warnings = defaultdict(lambda: deque(maxlen=MAX_WARNINGS))
+        self._bans_cache = {}  # guild_id -> (fetched_at, {lookup key: User})
+        self._role_member_counts = {}  # role_id -> (computed_at, count)
 
     # Helper function to check if user has admin privileges
     def has_admin_or_permission(self, member, permission_name):
@@ -16,6 +52,89 @@ class Moderation(commands.Cog):
             return True
         return getattr(member.guild_permissions, permission_name, False)
 
+    @staticmethod
+    def embed_from_template(template, title, values):
+        """Build an embed from a static template, filling the title and field values"""
+        data = dict(template)
+        data["title"] = title
+        data["fields"] = [dict(field, value=str(value)) for field, value in zip(template["fields"], values)]
+        return discord.Embed.from_dict(data)
+
+    async def purge_in_chunks(self, channel, count):
+        """Bulk-delete up to count messages, one request per chunk; returns how many were deleted"""
+        # Chunks run in order because every purge scans from the newest message,
+        # so concurrent chunks would overlap.
+        remaining = count
+        deleted = 0
+        while remaining > 0:
+            limit = min(remaining, PURGE_CHUNK)
+            batch = await channel.purge(limit=limit)
+            deleted += len(batch)
+            remaining -= len(batch)
+            if len(batch) < limit:
+                break
+        return deleted
+
+    async def get_bans(self, guild):
+        """Return banned users keyed by ID, name#tag and lowercased name, reusing a recent fetch"""
+        cached = self._bans_cache.get(guild.id)
+        if cached and time.monotonic() - cached[0] < BANS_CACHE_TTL:
+            return cached[1]
+        lookup = {}
+        async for entry in guild.bans(limit=None):
+            lookup[entry.user.name.lower()] = entry.user
+            lookup[str(entry.user).lower()] = entry.user
+            lookup[str(entry.user.id)] = entry.user
+        self._bans_cache[guild.id] = (time.monotonic(), lookup)
+        return lookup
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        """A new ban makes the cached list stale"""
+        self._bans_cache.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild, user):
+        """Drop the unbanned user from the cached list instead of refetching"""
+        cached = self._bans_cache.get(guild.id)
+        if cached:
+            self._bans_cache[guild.id] = (cached[0], {k: u for k, u in cached[1].items() if u.id != user.id})
+
+    async def cog_command_error(self, ctx, error):
+        """Single error path for every moderation command"""
+        if isinstance(error, commands.CommandInvokeError):
+            if isinstance(error.original, discord.Forbidden):
+                await ctx.send("❌ I don't have permission to do that to this user.")
+                return
+            logger.error(f"Moderation command {ctx.command} failed: {error.original}", exc_info=error.original)
+            await ctx.send("❌ Something went wrong while running that command.")
+        elif isinstance(error, commands.MissingPermissions):
+            await ctx.send("❌ No permission")
+        elif isinstance(error, commands.MissingRequiredArgument):
+            await ctx.send(f"❌ Missing: `{error.param.name}`\nUsage: `{ctx.clean_prefix}{ctx.command.qualified_name} {ctx.command.signature}`")
+        elif isinstance(error, (commands.BadArgument, commands.CheckFailure)):
+            # discord.py words these for users, e.g. 'Member "x" not found.'
+            await ctx.send(f"❌ {error}")
+        else:
+            logger.error(f"Moderation command {ctx.command} failed: {error}", exc_info=error)
+            await ctx.send("❌ Something went wrong while running that command.")
+
+    def role_member_count(self, role):
+        """Member count for a role; role.members scans the whole guild, so reuse recent counts"""
+        cached = self._role_member_counts.get(role.id)
+        if cached and time.monotonic() - cached[0] < ROLE_COUNT_TTL:
+            return cached[1]
+        count = sum(1 for _ in role.members)
+        self._role_member_counts[role.id] = (time.monotonic(), count)
+        return count
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Invalidate cached counts for roles that were added or removed"""
+        if before.roles != after.roles:
+            for role_id in {r.id for r in before.roles} ^ {r.id for r in after.roles}:
+                self._role_member_counts.pop(role_id, None)
+
     # BAN
     @commands.command(name="ban")
     async def ban(self, ctx, member: discord.Member = None, *, reason="No reason provided"):
@@ -27,13 +146,8 @@ class Moderation(commands.Cog):
         if not member:
             await ctx.send("❌ Please mention a user to ban.")
             return
-        try:
-            await member.ban(reason=reason)
-            await ctx.send(f"🔨 {member.mention} has been **banned**.\nReason: {reason}")
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to ban this user.")
-        except Exception as e:
-            await ctx.send(f"❌ Could not ban user: {e}")
+        await member.ban(reason=reason)
+        await ctx.send(f"🔨 {member.mention} has been **banned**.\nReason: {reason}")
 
     # UNBAN
     @commands.command(name="unban")
@@ -46,20 +160,14 @@ class Moderation(commands.Cog):
         if not user:
             await ctx.send("❌ Please specify the username#tag or ID to unban.")
             return
-        banned_users = await ctx.guild.bans()
-        target = None
-        for ban_entry in banned_users:
-            if user.lower() in (str(ban_entry.user), ban_entry.user.name.lower(), str(ban_entry.user.id)):
-                target = ban_entry.user
-                break
-        if not target:
-            await ctx.send("❌ User not found in ban list.")
-            return
-        try:
+        async with ctx.typing():
+            banned_users = await self.get_bans(ctx.guild)
+            target = banned_users.get(user.lower())
+            if not target:
+                await ctx.send("❌ User not found in ban list.")
+                return
             await ctx.guild.unban(target)
-            await ctx.send(f"✅ Unbanned {target.mention}")
-        except Exception as e:
-            await ctx.send(f"❌ Could not unban: {e}")
+        await ctx.send(f"✅ Unbanned {target.mention}")
 
     # KICK
     @commands.command(name="kick")
@@ -72,91 +180,61 @@ class Moderation(commands.Cog):
         if not member:
             await ctx.send("❌ Please mention a user to kick.")
             return
-        try:
-            await member.kick(reason=reason)
-            await ctx.send(f"👢 {member.mention} was **kicked**.\nReason: {reason}")
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to kick this user.")
-        except Exception as e:
-            await ctx.send(f"❌ Could not kick user: {e}")
+        await member.kick(reason=reason)
+        await ctx.send(f"👢 {member.mention} was **kicked**.\nReason: {reason}")
 
     # MUTE
     @commands.command(name="mute")
     async def mute(self, ctx, member: discord.Member = None, *, reason="No reason provided"):
-        # Check if user has manage_roles permission OR administrator
-        if not self.has_admin_or_permission(ctx.author, 'manage_roles'):
-            await ctx.send("❌ You need Manage Roles permission or Administrator role.")
+        # Check if user has moderate_members permission OR administrator
+        if not self.has_admin_or_permission(ctx.author, 'moderate_members'):
+            await ctx.send("❌ You need Timeout Members permission or Administrator role.")
             return
         
         if not member:
             await ctx.send("❌ Please mention a user to mute.")
             return
-        mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        try:
-            if not mute_role:
-                mute_role = await ctx.guild.create_role(name="Muted")
-                for channel in ctx.guild.channels:
-                    await channel.set_permissions(mute_role, speak=False, send_messages=False)
-            if mute_role in member.roles:
-                await ctx.send("⚠️ User is already muted.")
-                return
-            await member.add_roles(mute_role, reason=reason)
-            await ctx.send(f"🔇 {member.mention} has been **muted**.\nReason: {reason}")
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to mute this user.")
-        except Exception as e:
-            await ctx.send(f"❌ Could not mute: {e}")
+        if member.is_timed_out():
+            await ctx.send("⚠️ User is already muted.")
+            return
+        # Discord caps native timeouts at 28 days
+        await member.timeout(timedelta(days=28), reason=reason)
+        await ctx.send(f"🔇 {member.mention} has been **muted**.\nReason: {reason}")
 
     # UNMUTE
     @commands.command(name="unmute")
     async def unmute(self, ctx, member: discord.Member = None):
-        # Check if user has manage_roles permission OR administrator
-        if not self.has_admin_or_permission(ctx.author, 'manage_roles'):
-            await ctx.send("❌ You need Manage Roles permission or Administrator role.")
+        # Check if user has moderate_members permission OR administrator
+        if not self.has_admin_or_permission(ctx.author, 'moderate_members'):
+            await ctx.send("❌ You need Timeout Members permission or Administrator role.")
             return
         
         if not member:
             await ctx.send("❌ Please mention a user to unmute.")
             return
-        mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if not mute_role or mute_role not in member.roles:
+        if not member.is_timed_out():
             await ctx.send("❌ User is not muted.")
             return
-        try:
-            await member.remove_roles(mute_role)
-            await ctx.send(f"🔊 {member.mention} has been **unmuted**.")
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to unmute this user.")
-        except Exception as e:
-            await ctx.send(f"❌ Could not unmute: {e}")
+        await member.timeout(None)
+        await ctx.send(f"🔊 {member.mention} has been **unmuted**.")
 
     # TEMP MUTE
     @commands.command(name="tempmute")
     async def tempmute(self, ctx, member: discord.Member = None, duration: int = None, *, reason="No reason provided"):
-        # Check if user has manage_roles permission OR administrator
-        if not self.has_admin_or_permission(ctx.author, 'manage_roles'):
-            await ctx.send("❌ You need Manage Roles permission or Administrator role.")
+        # Check if user has moderate_members permission OR administrator
+        if not self.has_admin_or_permission(ctx.author, 'moderate_members'):
+            await ctx.send("❌ You need Timeout Members permission or Administrator role.")
             return
         
         if not member or not duration:
             await ctx.send("❌ Usage: `/tempmute <user> <duration_seconds> [reason]`")
             return
-        mute_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        try:
-            if not mute_role:
-                mute_role = await ctx.guild.create_role(name="Muted")
-                for channel in ctx.guild.channels:
-                    await channel.set_permissions(mute_role, speak=False, send_messages=False)
-            await member.add_roles(mute_role, reason=reason)
-            await ctx.send(f"⏳ {member.mention} has been muted for {duration} seconds.\nReason: {reason}")
-            await asyncio.sleep(duration)
-            if mute_role in member.roles:
-                await member.remove_roles(mute_role)
-                await ctx.send(f"🔊 {member.mention} has been **auto-unmuted** after {duration} seconds.")
-        except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to tempmute this user.")
-        except Exception as e:
-            await ctx.send(f"❌ Could not tempmute: {e}")
+        if duration < 1 or duration > 28 * 24 * 3600:
+            await ctx.send("❌ Duration must be between 1 second and 28 days.")
+            return
+        # Discord lifts the timeout itself once it expires
+        await member.timeout(timedelta(seconds=duration), reason=reason)
+        await ctx.send(f"⏳ {member.mention} has been muted for {duration} seconds.\nReason: {reason}")
 
     # WARN
     @commands.command(name="warn")
@@ -169,9 +247,7 @@ class Moderation(commands.Cog):
         if not member:
             await ctx.send("❌ Please mention a user to warn.")
             return
-        if member.id not in self.user_warnings:
-            self.user_warnings[member.id] = []
-        self.user_warnings[member.id].append((datetime.utcnow(), reason))
+        self.user_warnings[member.id].append((int(time.time()), reason))
         await ctx.send(f"⚠️ {member.mention} has been **warned**.\nReason: {reason}")
 
     # INFRACTIONS
@@ -189,7 +265,7 @@ class Moderation(commands.Cog):
             )
             for i, (timestamp, reason) in enumerate(self.user_warnings[member.id], start=1):
                 embed.add_field(
-                    name=f"#{i} - {timestamp.strftime('%Y-%m-%d %H:%M UTC')}",
+                    name=f"#{i} - {datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}",
                     value=reason,
                     inline=False
                 )
@@ -206,13 +282,11 @@ class Moderation(commands.Cog):
         if amount is None:
             await ctx.send("❌ You must specify the number of messages to delete, e.g., `/clear 10`.")
             return
-        try:
-            await ctx.channel.purge(limit=amount + 1)
-            msg = await ctx.send(f"🧹 Deleted {amount} messages.")
-            await asyncio.sleep(2)
-            await msg.delete()
-        except Exception as e:
-            await ctx.send(f"❌ Could not delete messages: {e}")
+        amount = min(amount, MAX_CLEAR)
+        # +1 to include the command message
+        async with ctx.typing():
+            deleted = await self.purge_in_chunks(ctx.channel, amount + 1)
+        await ctx.send(f"🧹 Deleted {max(deleted - 1, 0)} messages.", delete_after=2)
 
     # ROLE INFO
     @commands.command(name="role-info")
@@ -220,14 +294,12 @@ class Moderation(commands.Cog):
         if not role:
             await ctx.send("❌ Please mention a role.")
             return
-        try:
-            embed = discord.Embed(title=f"🎭 Role Info: {role.name}", color=role.color)
-            embed.add_field(name="ID", value=role.id)
-            embed.add_field(name="Members", value=len(role.members))
-            embed.add_field(name="Created", value=role.created_at.strftime("%Y-%m-%d"))
-            await ctx.send(embed=embed)
-        except Exception as e:
-            await ctx.send(f"❌ Could not fetch role info: {e}")
+        embed = discord.Embed(title=f"🎭 Role Info: {role.name}", color=role.color)
+        embed.add_field(name="ID", value=role.id)
+        # Without a chunked member cache the count would be wrong, so don't compute it
+        embed.add_field(name="Members", value=self.role_member_count(role) if ctx.guild.chunked else "(unchunked)")
+        embed.add_field(name="Created", value=role.created_at.strftime("%Y-%m-%d"))
+        await ctx.send(embed=embed)
 
     # USER INFO
     @commands.command(name="user-info")
@@ -235,37 +307,30 @@ class Moderation(commands.Cog):
         if not member:
             await ctx.send("❌ Please mention a user.")
             return
-        try:
-            join_date = member.joined_at.strftime("%Y-%m-%d")
-            embed = discord.Embed(
-                title=f"👤 User Info: {member.display_name}",
-                color=discord.Color.blue()
+        embed = self.embed_from_template(
+            self._USER_INFO_TEMPLATE,
+            f"👤 User Info: {member.display_name}",
+            (
+                member.joined_at.strftime("%Y-%m-%d"),
+                member.created_at.strftime("%Y-%m-%d"),
+                ", ".join(r.name for r in member.roles if not r.is_default()) or "None",
             )
-            embed.add_field(name="Joined Server", value=join_date)
-            embed.add_field(name="Account Created", value=member.created_at.strftime("%Y-%m-%d"))
-            embed.add_field(name="Roles", value=", ".join([r.name for r in member.roles if r.name != '@everyone']) or "None")
-            embed.set_thumbnail(url=member.display_avatar)
-            await ctx.send(embed=embed)
-        except Exception as e:
-            await ctx.send(f"❌ Could not fetch user info: {e}")
+        )
+        embed.set_thumbnail(url=member.display_avatar)
+        await ctx.send(embed=embed)
 
     # SERVER INFO
     @commands.command(name="server-info")
     async def server_info(self, ctx):
-        try:
-            guild = ctx.guild
-            embed = discord.Embed(
-                title=f"🏰 Server Info: {guild.name}",
-                color=discord.Color.green()
-            )
-            embed.add_field(name="Owner", value=guild.owner.mention)
-            embed.add_field(name="Members", value=guild.member_count)
-            embed.add_field(name="Created", value=guild.created_at.strftime("%Y-%m-%d"))
-            if guild.icon:
-                embed.set_thumbnail(url=guild.icon.url)
-            await ctx.send(embed=embed)
-        except Exception as e:
-            await ctx.send(f"❌ Could not fetch server info: {e}")
+        guild = ctx.guild
+        embed = self.embed_from_template(
+            self._SERVER_INFO_TEMPLATE,
+            f"🏰 Server Info: {guild.name}",
+            (guild.owner.mention, guild.member_count, guild.created_at.strftime("%Y-%m-%d"))
+        )
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+        await ctx.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -5,17 +5,258 @@ from datetime import datetime, timedelta
 import logging
 from typing import Optional, Literal
 import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from psycopg2.extras import execute_values
 
 logger = logging.getLogger(__name__)
 
+
+class DatabaseUnavailable(commands.CommandError):
+    """Raised by a command when the pool cannot hand out a connection"""
+
+
+# Stamped on productivity_stats by init_db_tables; bump it whenever the DDL there changes
+SCHEMA_VERSION = 'productivity schema 3'
+
+STATS_FLUSH_SECONDS = 30
+AUTO_END_RETRY_MINUTES = 1
+STATS_CACHE_TTL = 60
+STATS_FIELDS = ('total_focus_minutes', 'total_pomodoros', 'total_dnd_minutes', 'focus_sessions_count')
+# Adding a counter only needs a productivity_stats column and an entry in STATS_FIELDS
+STATS_UPSERT_SQL = f"""
+    INSERT INTO productivity_stats (user_id, guild_id, {', '.join(STATS_FIELDS)})
+    VALUES %s
+    ON CONFLICT (user_id, guild_id) 
+    DO UPDATE SET 
+        {''.join(f'{field} = productivity_stats.{field} + EXCLUDED.{field}, ' for field in STATS_FIELDS)}
+        last_updated = CURRENT_TIMESTAMP
+"""
+
+
+@dataclass
+class FocusSession:
+    """In-memory state of an active focus session"""
+    __slots__ = ('session_id', 'start_time', 'duration', 'type', 'channel_id')
+    session_id: str
+    start_time: datetime
+    duration: int
+    type: str
+    channel_id: int
+
+
+@dataclass
+class PomodoroSession:
+    """In-memory state of an active Pomodoro session"""
+    __slots__ = ('session_id', 'start_time', 'duration', 'completed_pomodoros', 'is_break', 'channel_id')
+    session_id: str
+    start_time: datetime
+    duration: int
+    completed_pomodoros: int
+    is_break: bool
+    channel_id: int
+
+
+@dataclass
+class DndState:
+    """In-memory state of an active DND period"""
+    __slots__ = ('start_time', 'end_time', 'duration', 'reason', 'guild_id')
+    start_time: datetime
+    end_time: datetime
+    duration: int
+    reason: str
+    guild_id: int
+
+
 class Productivity(commands.Cog):
     def __init__(self, bot, get_db_connection_func):
         self.bot = bot
         self.get_db_connection = get_db_connection_func
-        self.focus_sessions = {}
-        self.pomodoro_sessions = {}
-        self.dnd_users = {}
-        self.init_db_tables()
+        self.focus_sessions = {}  # user_id -> FocusSession
+        self.pomodoro_sessions = {}  # user_id -> PomodoroSession
+        self.dnd_users = {}  # user_id -> DndState
+        self.auto_end_tasks = {}  # (kind, user_id) -> asyncio.Task
+        self.stats_delta = {}  # (user_id, guild_id) -> pending productivity_stats increments
+        self.stats_cache = {}  # (user_id, guild_id) -> (monotonic time, _db_focus_stats result)
+
+        # Static group help embeds, built once
+        self.focus_help_embed = discord.Embed(
+            title="🎯 Focus Commands",
+            description=(
+                "**/focus start <duration>** - Start focus session\n"
+                "**/focus end** - End focus session\n"
+                "**/focus stats [user]** - View focus statistics\n"
+                "**/focus list** - List active focus sessions"
+            ),
+            color=discord.Color.purple()
+        )
+        self.pomodoro_help_embed = discord.Embed(
+            title="🍅 Pomodoro Commands",
+            description=(
+                "**/pomodoro start [duration]** - Start Pomodoro timer (25min default)\n"
+                "**/pomodoro break** - Start break timer\n"
+                "**/pomodoro end** - End current session\n"
+                "**/pomodoro stats** - View Pomodoro statistics"
+            ),
+            color=discord.Color.red()
+        )
+        self.dnd_help_embed = discord.Embed(
+            title="🔕 Do Not Disturb Commands",
+            description=(
+                "**/dnd start <duration> [reason]** - Enable DND mode\n"
+                "**/dnd end** - Disable DND mode\n"
+                "**/dnd status** - Check your DND status"
+            ),
+            color=discord.Color.dark_gray()
+        )
+
+    async def cog_load(self):
+        """Create tables off the event loop once the cog is added"""
+        await self.run_db(self.init_db_tables)
+        await self.recover_sessions()
+        self.flush_stats.start()
+
+    async def cog_unload(self):
+        """Cancel pending auto-end timers and write out buffered stats"""
+        for task in self.auto_end_tasks.values():
+            task.cancel()
+        self.auto_end_tasks.clear()
+        self.flush_stats.cancel()
+        await self.write_stats_delta()
+
+    def schedule_auto_end(self, kind, user_id, channel_id, minutes, finish):
+        """Run finish(user_id, channel) after `minutes` without holding the command open"""
+        self.cancel_auto_end(kind, user_id)
+        self.auto_end_tasks[(kind, user_id)] = asyncio.create_task(
+            self._auto_end(kind, user_id, channel_id, minutes, finish)
+        )
+
+    def cancel_auto_end(self, kind, user_id):
+        """Cancel a pending auto-end timer, if any"""
+        task = self.auto_end_tasks.pop((kind, user_id), None)
+        if task:
+            task.cancel()
+
+    def restore_session(self, sessions, kind, user_id, session, channel_id, finish):
+        """Put back a session whose closing write failed, unless a new one has taken its place"""
+        if sessions.setdefault(user_id, session) is session and (kind, user_id) not in self.auto_end_tasks:
+            # The timer that tried to end it has already fired; try again shortly
+            self.schedule_auto_end(kind, user_id, channel_id, AUTO_END_RETRY_MINUTES, finish)
+
+    async def _auto_end(self, kind, user_id, channel_id, minutes, finish):
+        """Background timer behind schedule_auto_end"""
+        await asyncio.sleep(minutes * 60)
+        # Timers recovered at startup can fire before the channel cache is filled
+        await self.bot.wait_until_ready()
+        self.auto_end_tasks.pop((kind, user_id), None)
+        channel = self.bot.get_channel(channel_id)
+        if channel:
+            await finish(user_id, channel)
+        else:
+            logger.warning(f"Auto-end {kind} for {user_id}: channel {channel_id} no longer available")
+
+    async def run_db(self, fn, *args):
+        """Run a blocking psycopg2 helper in a worker thread so the gateway keeps running"""
+        return await asyncio.to_thread(fn, *args)
+
+    async def cog_command_error(self, ctx, error):
+        """Single error path for every productivity command"""
+        if isinstance(error, DatabaseUnavailable):
+            await ctx.send("❌ Database connection unavailable. Please try again later.", ephemeral=True)
+            return
+        # Slash invocations wrap the app_commands error one level deeper
+        if isinstance(error, commands.HybridCommandError):
+            error = error.original
+        if isinstance(error, (commands.CommandInvokeError, app_commands.CommandInvokeError)):
+            logger.error(f"Productivity command {ctx.command} failed: {error.original}", exc_info=error.original)
+            await ctx.send(f"❌ Failed to {ctx.command.description[0].lower()}{ctx.command.description[1:]}.", ephemeral=True)
+        else:
+            await ctx.send(f"❌ {error}", ephemeral=True)
+
+    async def recover_sessions(self):
+        """Reload sessions left open by a restart and reschedule their timers"""
+        now = datetime.utcnow()
+        try:
+            active = await self.run_db(self._db_load_active, now)
+        except Exception as e:
+            logger.error(f"❌ Failed to recover productivity sessions: {e}")
+            return
+        if active is None:
+            return
+        (expired_focus, expired_pomodoro, expired_dnd), focus_rows, pomodoro_rows, dnd_rows = active
+        
+        # Closed without an announcement; only their stats are recorded
+        for user_id, guild_id, minutes in expired_focus:
+            self.add_stats_delta(user_id, guild_id, total_focus_minutes=minutes, focus_sessions_count=1)
+        for user_id, guild_id in expired_pomodoro:
+            self.add_stats_delta(user_id, guild_id, total_pomodoros=1)
+        for user_id, guild_id, minutes in expired_dnd:
+            self.add_stats_delta(user_id, guild_id, total_dnd_minutes=minutes)
+        expired = len(expired_focus) + len(expired_pomodoro) + len(expired_dnd)
+        if expired:
+            logger.info(f"✅ Closed {expired} productivity sessions that ended during downtime")
+        
+        def minutes_left(ends_at):
+            return max((ends_at - now).total_seconds() / 60, 0)
+        
+        for user_id, session_id, channel_id, start_time, duration, focus_type in focus_rows:
+            self.focus_sessions[user_id] = FocusSession(session_id, start_time, duration, focus_type, channel_id)
+            self.schedule_auto_end('focus', user_id, channel_id,
+                                   minutes_left(start_time + timedelta(minutes=duration)), self._end_focus_session)
+        
+        for user_id, session_id, channel_id, start_time, duration, completed, is_break in pomodoro_rows:
+            self.pomodoro_sessions[user_id] = PomodoroSession(session_id, start_time, duration, completed,
+                                                              is_break, channel_id)
+            # Only the first Pomodoro of a session is timed; later state waits for the user
+            if not completed and not is_break:
+                self.schedule_auto_end('pomodoro', user_id, channel_id,
+                                       minutes_left(start_time + timedelta(minutes=duration)), self._complete_pomodoro)
+        
+        for user_id, guild_id, channel_id, start_time, end_time, duration, reason in dnd_rows:
+            self.dnd_users[user_id] = DndState(start_time, end_time, duration, reason, guild_id)
+            # Rows from before channel_id was stored stay active until /dnd end or a restart after they expire
+            if channel_id:
+                self.schedule_auto_end('dnd', user_id, channel_id, minutes_left(end_time), self._end_dnd)
+        
+        total = len(focus_rows) + len(pomodoro_rows) + len(dnd_rows)
+        if total:
+            logger.info(f"✅ Recovered {total} active productivity sessions")
+
+    def add_stats_delta(self, user_id, guild_id, **increments):
+        """Buffer productivity_stats increments until the next flush"""
+        delta = self.stats_delta.setdefault((user_id, guild_id), dict.fromkeys(STATS_FIELDS, 0))
+        for field, amount in increments.items():
+            delta[field] += amount
+
+    @tasks.loop(seconds=STATS_FLUSH_SECONDS)
+    async def flush_stats(self):
+        """Periodically write buffered stats increments"""
+        await self.write_stats_delta()
+
+    @flush_stats.before_loop
+    async def before_flush_stats(self):
+        """Wait for bot to be ready before starting the stats flush loop"""
+        await self.bot.wait_until_ready()
+
+    async def write_stats_delta(self):
+        """Write all buffered stats increments in a single upsert"""
+        if not self.stats_delta:
+            return
+        pending, self.stats_delta = self.stats_delta, {}
+        try:
+            written = await self.run_db(self._db_upsert_stats, pending)
+        except Exception as e:
+            logger.error(f"❌ Failed to flush productivity stats: {e}")
+            written = False
+        if not written:
+            # Put the increments back so the next flush retries them
+            for (user_id, guild_id), delta in pending.items():
+                self.add_stats_delta(user_id, guild_id, **delta)
+            return
+        # Cached totals for these users no longer match the table
+        for key in pending:
+            self.stats_cache.pop(key, None)
 
     def init_db_tables(self):
         """Initialize productivity tables"""
@@ -23,6 +264,20 @@ class Productivity(commands.Cog):
             with self.get_db_connection() as conn:
                 if conn:
                     with conn.cursor() as cur:
+                        # Already migrated: skip the DDL and its catalog locks
+                        if self._db_schema_version(cur) == SCHEMA_VERSION:
+                            logger.info("✅ Productivity tables already initialized")
+                            return
+                        
+                        # Serialize concurrent starts and check again once the lock is held,
+                        # so a process that waited finds everything in place
+                        cur.execute("SELECT pg_advisory_xact_lock(hashtext('productivity_ddl'))")
+                        previous_version = self._db_schema_version(cur)
+                        if previous_version == SCHEMA_VERSION:
+                            conn.commit()
+                            logger.info("✅ Productivity tables already initialized")
+                            return
+                        
                         # Focus sessions table
                         cur.execute("""
                             CREATE TABLE IF NOT EXISTS focus_sessions (
@@ -34,6 +289,7 @@ class Productivity(commands.Cog):
                                 start_time TIMESTAMP NOT NULL,
                                 end_time TIMESTAMP,
                                 duration_minutes INT,
+                                planned_minutes INT,
                                 focus_type TEXT DEFAULT 'focus',
                                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                             )
@@ -63,6 +319,7 @@ class Productivity(commands.Cog):
                                 id SERIAL PRIMARY KEY,
                                 user_id BIGINT NOT NULL,
                                 guild_id BIGINT NOT NULL,
+                                channel_id BIGINT,
                                 start_time TIMESTAMP NOT NULL,
                                 end_time TIMESTAMP,
                                 duration_minutes INT,
@@ -87,6 +344,72 @@ class Productivity(commands.Cog):
                             )
                         """)
                         
+                        # Store focus_type as a 4-byte enum instead of free text
+                        cur.execute("""
+                            DO $$ BEGIN
+                                CREATE TYPE focus_type_enum AS ENUM ('focus', 'deep_work', 'study', 'coding', 'writing');
+                            EXCEPTION WHEN duplicate_object THEN NULL;
+                            END $$
+                        """)
+                        cur.execute("""
+                            ALTER TABLE focus_sessions
+                                ALTER COLUMN focus_type DROP DEFAULT,
+                                ALTER COLUMN focus_type TYPE focus_type_enum USING focus_type::focus_type_enum,
+                                ALTER COLUMN focus_type SET DEFAULT 'focus'
+                        """)
+                        
+                        # Columns needed to resume sessions after a restart
+                        cur.execute("ALTER TABLE focus_sessions ADD COLUMN IF NOT EXISTS planned_minutes INT")
+                        cur.execute("ALTER TABLE dnd_status ADD COLUMN IF NOT EXISTS channel_id BIGINT")
+                        
+                        if previous_version is None:
+                            # Rows left open by the code before session recovery: it never closed
+                            # Pomodoro rows, lost focus sessions on restart and left expired DND
+                            # active. Close them once so recovery doesn't resume them.
+                            now = datetime.utcnow()
+                            cur.execute("UPDATE pomodoro_sessions SET end_time = %s WHERE end_time IS NULL", (now,))
+                            cur.execute("""
+                                UPDATE focus_sessions SET end_time = start_time
+                                WHERE end_time IS NULL AND planned_minutes IS NULL
+                            """)
+                            cur.execute("""
+                                UPDATE dnd_status SET active = FALSE
+                                WHERE active = TRUE AND end_time <= %s
+                            """, (now,))
+                        
+                        # Indexes for the per-user lookups
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_focus_sessions_user_guild_time
+                            ON focus_sessions (user_id, guild_id, start_time DESC)
+                            INCLUDE (focus_type, duration_minutes)
+                        """)
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_pomodoro_sessions_user_guild_time
+                            ON pomodoro_sessions (user_id, guild_id, start_time DESC)
+                        """)
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_dnd_status_user_guild_active
+                            ON dnd_status (user_id, guild_id, active)
+                        """)
+                        
+                        # Partial indexes over the small set of running sessions
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_focus_sessions_active
+                            ON focus_sessions (guild_id, user_id) INCLUDE (start_time, focus_type)
+                            WHERE end_time IS NULL
+                        """)
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_pomodoro_sessions_active
+                            ON pomodoro_sessions (guild_id, user_id)
+                            WHERE end_time IS NULL
+                        """)
+                        cur.execute("""
+                            CREATE INDEX IF NOT EXISTS idx_dnd_status_active
+                            ON dnd_status (guild_id, user_id)
+                            WHERE active = TRUE
+                        """)
+                        
+                        cur.execute(f"COMMENT ON TABLE productivity_stats IS '{SCHEMA_VERSION}'")
                         conn.commit()
                     logger.info("✅ Productivity tables initialized")
                 else:
@@ -96,334 +419,557 @@ class Productivity(commands.Cog):
             import traceback
             traceback.print_exc()
 
+    # ===== BLOCKING DB HELPERS (run via run_db) =====
+
+    @staticmethod
+    def _db_schema_version(cur):
+        """Return the SCHEMA_VERSION stamped on productivity_stats, or None"""
+        cur.execute("SELECT obj_description(to_regclass('productivity_stats'), 'pg_class')")
+        return cur.fetchone()[0]
+
+    def _db_load_active(self, now):
+        """Close sessions that ran out before `now`; return them with the latest open rows per user, or None"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                # Sessions that ran out while the bot was down end at their planned length
+                cur.execute("""
+                    UPDATE focus_sessions
+                    SET end_time = start_time + planned_minutes * interval '1 minute', duration_minutes = planned_minutes
+                    WHERE end_time IS NULL AND start_time + planned_minutes * interval '1 minute' <= %s
+                    RETURNING user_id, guild_id, planned_minutes
+                """, (now,))
+                expired_focus = cur.fetchall()
+                cur.execute("""
+                    UPDATE pomodoro_sessions
+                    SET end_time = start_time + duration_minutes * interval '1 minute', completed_pomodoros = 1
+                    WHERE end_time IS NULL AND completed_pomodoros = 0 AND NOT is_break
+                    AND start_time + duration_minutes * interval '1 minute' <= %s
+                    RETURNING user_id, guild_id
+                """, (now,))
+                expired_pomodoro = cur.fetchall()
+                cur.execute("""
+                    UPDATE dnd_status
+                    SET active = FALSE
+                    WHERE active = TRUE AND end_time <= %s
+                    RETURNING user_id, guild_id, duration_minutes
+                """, (now,))
+                expired_dnd = cur.fetchall()
+                
+                cur.execute("""
+                    SELECT DISTINCT ON (user_id) user_id, session_id, channel_id, start_time,
+                           COALESCE(planned_minutes, 60), focus_type
+                    FROM focus_sessions
+                    WHERE end_time IS NULL
+                    ORDER BY user_id, start_time DESC
+                """)
+                focus_rows = cur.fetchall()
+                cur.execute("""
+                    SELECT DISTINCT ON (user_id) user_id, session_id, channel_id, start_time,
+                           duration_minutes, completed_pomodoros, is_break
+                    FROM pomodoro_sessions
+                    WHERE end_time IS NULL
+                    ORDER BY user_id, start_time DESC
+                """)
+                pomodoro_rows = cur.fetchall()
+                cur.execute("""
+                    SELECT DISTINCT ON (user_id) user_id, guild_id, channel_id, start_time,
+                           end_time, duration_minutes, reason
+                    FROM dnd_status
+                    WHERE active = TRUE
+                    ORDER BY user_id, start_time DESC
+                """)
+                dnd_rows = cur.fetchall()
+                conn.commit()
+            return (expired_focus, expired_pomodoro, expired_dnd), focus_rows, pomodoro_rows, dnd_rows
+
+    def _db_insert_focus(self, session_id, user_id, guild_id, channel_id, start_time, duration, focus_type):
+        """Insert a focus session row; returns False when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO focus_sessions (session_id, user_id, guild_id, channel_id, start_time, planned_minutes, focus_type)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (session_id, user_id, guild_id, channel_id, start_time, duration, focus_type))
+                conn.commit()
+            return True
+
+    def _db_upsert_stats(self, pending):
+        """Add buffered increments to productivity_stats with one multi-row upsert"""
+        rows = [(user_id, guild_id, *(delta[field] for field in STATS_FIELDS))
+                for (user_id, guild_id), delta in pending.items()]
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                execute_values(cur, STATS_UPSERT_SQL, rows, page_size=500)
+                conn.commit()
+            return True
+
+    def _db_end_focus(self, session_id, end_time, actual_duration):
+        """Close a focus session"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE focus_sessions 
+                    SET end_time = %s, duration_minutes = %s
+                    WHERE session_id = %s
+                """, (end_time, actual_duration, session_id))
+                conn.commit()
+            return True
+
+    def _db_active_focus(self, guild_id, now):
+        """Return up to 25 running focus sessions in a guild, newest first, or None"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                # Rows still inside their planned length; anything older was orphaned, not running
+                cur.execute("""
+                    SELECT user_id, start_time, focus_type
+                    FROM focus_sessions
+                    WHERE guild_id = %s AND end_time IS NULL
+                    AND start_time + planned_minutes * interval '1 minute' > %s
+                    ORDER BY start_time DESC
+                    LIMIT 25
+                """, (guild_id, now))
+                return cur.fetchall()
+
+    def _db_focus_stats(self, user_id, guild_id, since):
+        """Return (stats_row, recent_sessions), or None when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                # Productivity stats and recent focus sessions in one round-trip
+                cur.execute("""
+                    WITH s AS (
+                        SELECT total_focus_minutes, focus_sessions_count, total_pomodoros
+                        FROM productivity_stats 
+                        WHERE user_id = %(user_id)s AND guild_id = %(guild_id)s
+                    ), r AS (
+                        SELECT COUNT(*) AS count, COALESCE(AVG(duration_minutes), 0) AS avg_duration, focus_type
+                        FROM focus_sessions 
+                        WHERE user_id = %(user_id)s AND guild_id = %(guild_id)s 
+                        AND start_time >= %(since)s
+                        GROUP BY focus_type
+                    )
+                    SELECT (SELECT row_to_json(s) FROM s),
+                           COALESCE((SELECT json_agg(r) FROM r), '[]'::json)
+                """, {'user_id': user_id, 'guild_id': guild_id, 'since': since})
+                stats, recent = cur.fetchone()
+                if stats:
+                    stats = (stats['total_focus_minutes'], stats['focus_sessions_count'], stats['total_pomodoros'])
+                return stats, [(row['count'], row['avg_duration'], row['focus_type']) for row in recent]
+
+    def _db_insert_pomodoro(self, session_id, user_id, guild_id, channel_id, start_time, duration):
+        """Insert a Pomodoro session row"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO pomodoro_sessions (session_id, user_id, guild_id, channel_id, start_time, duration_minutes)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (session_id, user_id, guild_id, channel_id, start_time, duration))
+                conn.commit()
+            return True
+
+    def _db_complete_pomodoro(self, session_id, completed_pomodoros):
+        """Record a completed Pomodoro"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE pomodoro_sessions 
+                    SET completed_pomodoros = %s, is_break = TRUE
+                    WHERE session_id = %s
+                """, (completed_pomodoros, session_id))
+                conn.commit()
+            return True
+
+    def _db_set_pomodoro_break(self, session_id, is_break, break_duration=None):
+        """Persist a Pomodoro break transition (break_duration is kept when None)"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE pomodoro_sessions 
+                    SET is_break = %s, break_duration = COALESCE(%s, break_duration)
+                    WHERE session_id = %s
+                """, (is_break, break_duration, session_id))
+                conn.commit()
+            return True
+
+    def _db_end_pomodoro(self, session_id, end_time):
+        """Close a Pomodoro session"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE pomodoro_sessions 
+                    SET end_time = %s, is_break = FALSE
+                    WHERE session_id = %s
+                """, (end_time, session_id))
+                conn.commit()
+            return True
+
+    def _db_insert_dnd(self, user_id, guild_id, channel_id, start_time, end_time, duration, reason):
+        """Insert an active DND row"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO dnd_status (user_id, guild_id, channel_id, start_time, end_time, duration_minutes, reason)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, guild_id, channel_id, start_time, end_time, duration, reason))
+                conn.commit()
+            return True
+
+    def _db_end_dnd(self, user_id, guild_id, end_time):
+        """Deactivate a user's DND row"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE dnd_status 
+                    SET active = FALSE, end_time = %s
+                    WHERE user_id = %s AND guild_id = %s AND active = TRUE
+                """, (end_time, user_id, guild_id))
+                conn.commit()
+            return True
+
     # ===== FOCUS COMMANDS =====
 
     @commands.hybrid_group(name="focus", description="Manage focus sessions", invoke_without_command=True)
     async def focus(self, ctx: commands.Context):
         """Focus commands help"""
-        embed = discord.Embed(
-            title="🎯 Focus Commands",
-            description=(
-                "**/focus start <duration>** - Start focus session\n"
-                "**/focus end** - End focus session\n"
-                "**/focus stats [user]** - View focus statistics\n"
-                "**/focus list** - List active focus sessions"
-            ),
-            color=discord.Color.purple()
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self.focus_help_embed)
 
     @focus.command(name="start", description="Start a focus session")
     @app_commands.describe(
         duration="Focus duration in minutes (default: 60)",
         type="Type of focus session"
     )
-    async def focus_start(self, ctx: commands.Context, duration: int = 60, 
+    async def focus_start(self, ctx: commands.Context, duration: commands.Range[int, 5, 480] = 60, 
                          type: Literal["focus", "deep_work", "study", "coding", "writing"] = "focus"):
         """Start focus session"""
-        try:
-            if ctx.author.id in self.focus_sessions:
-                await ctx.send("❌ You already have an active focus session! Use `/focus end` to stop it first.", ephemeral=True)
-                return
+        if ctx.author.id in self.focus_sessions:
+            await ctx.send("❌ You already have an active focus session! Use `/focus end` to stop it first.", ephemeral=True)
+            return
+        
+        start_time = datetime.utcnow()
+        session_id = f"FOCUS{uuid.uuid4().hex[:12].upper()}"
+        
+        await ctx.defer()
+        if await self.run_db(self._db_insert_focus, session_id, ctx.author.id, ctx.guild.id,
+                             ctx.channel.id, start_time, duration, type):
+            # The new session shows up in the recent-activity counts
+            self.stats_cache.pop((ctx.author.id, ctx.guild.id), None)
+            # Store in memory
+            self.focus_sessions[ctx.author.id] = FocusSession(
+                session_id=session_id,
+                start_time=start_time,
+                duration=duration,
+                type=type,
+                channel_id=ctx.channel.id
+            )
             
-            if duration < 5 or duration > 480:  # 5 minutes to 8 hours
-                await ctx.send("❌ Focus duration must be between 5 and 480 minutes.", ephemeral=True)
-                return
+            embed = discord.Embed(
+                title="🎯 Focus Session Started",
+                description=f"**Duration:** {duration} minutes\n**Type:** {type.replace('_', ' ').title()}",
+                color=discord.Color.green()
+            )
+            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
+            embed.set_footer(text=f"Session ID: {session_id}")
             
-            session_id = f"FOCUS{int(datetime.utcnow().timestamp())}"
-            start_time = datetime.utcnow()
+            await ctx.send(embed=embed)
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO focus_sessions (session_id, user_id, guild_id, channel_id, start_time, focus_type)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (session_id, ctx.author.id, ctx.guild.id, ctx.channel.id, start_time, type))
-                        conn.commit()
-                    
-                    # Store in memory
-                    self.focus_sessions[ctx.author.id] = {
-                        'session_id': session_id,
-                        'start_time': start_time,
-                        'duration': duration,
-                        'type': type,
-                        'channel_id': ctx.channel.id
-                    }
-                    
-                    embed = discord.Embed(
-                        title="🎯 Focus Session Started",
-                        description=f"**Duration:** {duration} minutes\n**Type:** {type.replace('_', ' ').title()}",
-                        color=discord.Color.green()
-                    )
-                    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-                    embed.set_footer(text=f"Session ID: {session_id}")
-                    
-                    message = await ctx.send(embed=embed)
-                    
-                    # Set up auto-end after duration
-                    await asyncio.sleep(duration * 60)  # Convert to seconds
-                    
-                    if ctx.author.id in self.focus_sessions:
-                        await self._end_focus_session(ctx.author.id, ctx.channel)
-                else:
-                    await ctx.send("❌ Database connection unavailable. Please try again later.", ephemeral=True)
-                    
-        except Exception as e:
-            logger.error(f"focus_start error: {e}")
-            await ctx.send("❌ Failed to start focus session.", ephemeral=True)
+            # Auto-end after duration without keeping this command running
+            self.schedule_auto_end('focus', ctx.author.id, ctx.channel.id, duration, self._end_focus_session)
+        else:
+            raise DatabaseUnavailable()
 
     @focus.command(name="end", description="End current focus session")
     async def focus_end(self, ctx: commands.Context):
         """End focus session"""
-        try:
-            if ctx.author.id not in self.focus_sessions:
-                await ctx.send("❌ No active focus session found!", ephemeral=True)
-                return
-            
-            await self._end_focus_session(ctx.author.id, ctx.channel)
-            
-        except Exception as e:
-            logger.error(f"focus_end error: {e}")
-            await ctx.send("❌ Failed to end focus session.", ephemeral=True)
+        if ctx.author.id not in self.focus_sessions:
+            await ctx.send("❌ No active focus session found!", ephemeral=True)
+            return
+        
+        if await self._end_focus_session(ctx.author.id, ctx.channel) is False:
+            raise DatabaseUnavailable()
 
     async def _end_focus_session(self, user_id, channel):
         """Helper method to end focus session"""
         try:
-            session_data = self.focus_sessions.get(user_id)
+            # Pop first so a concurrent auto-end and /focus end can't both record the session
+            session_data = self.focus_sessions.pop(user_id, None)
             if not session_data:
                 return
             
-            session_id = session_data['session_id']
-            start_time = session_data['start_time']
-            duration = session_data['duration']
-            focus_type = session_data['type']
+            session_id = session_data.session_id
+            start_time = session_data.start_time
+            focus_type = session_data.type
             
-            end_time = datetime.utcnow()
+            # A session recovered after downtime ends at its planned length, not at restart time
+            end_time = min(datetime.utcnow(), start_time + timedelta(minutes=session_data.duration))
             actual_duration = int((end_time - start_time).total_seconds() / 60)
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            UPDATE focus_sessions 
-                            SET end_time = %s, duration_minutes = %s
-                            WHERE session_id = %s
-                        """, (end_time, actual_duration, session_id))
-                        
-                        # Update productivity stats
-                        cur.execute("""
-                            INSERT INTO productivity_stats (user_id, guild_id, total_focus_minutes, focus_sessions_count)
-                            VALUES (%s, %s, %s, 1)
-                            ON CONFLICT (user_id, guild_id) 
-                            DO UPDATE SET 
-                                total_focus_minutes = productivity_stats.total_focus_minutes + %s,
-                                focus_sessions_count = productivity_stats.focus_sessions_count + 1,
-                                last_updated = CURRENT_TIMESTAMP
-                        """, (user_id, channel.guild.id, actual_duration, actual_duration))
-                        
-                        conn.commit()
-                    
-                    # Remove from memory
-                    del self.focus_sessions[user_id]
-                    
-                    user = self.bot.get_user(user_id)
-                    embed = discord.Embed(
-                        title="✅ Focus Session Completed",
-                        description=f"**Duration:** {actual_duration} minutes\n**Type:** {focus_type.replace('_', ' ').title()}",
-                        color=discord.Color.orange()
-                    )
-                    embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.avatar.url if user and user.avatar else None)
-                    embed.set_footer(text=f"Session ID: {session_id}")
-                    
-                    await channel.send(embed=embed)
+            ended = False
+            try:
+                ended = await self.run_db(self._db_end_focus, session_id, end_time, actual_duration)
+            finally:
+                if not ended:
+                    # Keep the session so the user can retry /focus end
+                    self.restore_session(self.focus_sessions, 'focus', user_id, session_data,
+                                         channel.id, self._end_focus_session)
+            if ended:
+                self.cancel_auto_end('focus', user_id)
+                self.stats_cache.pop((user_id, channel.guild.id), None)
+                self.add_stats_delta(user_id, channel.guild.id, total_focus_minutes=actual_duration,
+                                     focus_sessions_count=1)
+                user = self.bot.get_user(user_id)
+                embed = discord.Embed(
+                    title="✅ Focus Session Completed",
+                    description=f"**Duration:** {actual_duration} minutes\n**Type:** {focus_type.replace('_', ' ').title()}",
+                    color=discord.Color.orange()
+                )
+                embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.display_avatar.url if user else None)
+                embed.set_footer(text=f"Session ID: {session_id}")
+                
+                await channel.send(embed=embed)
+                return True
+            else:
+                return False
         except Exception as e:
             logger.error(f"_end_focus_session error: {e}")
 
+    @focus.command(name="list", description="List active focus sessions")
+    async def focus_list(self, ctx: commands.Context):
+        """List active focus sessions in this server"""
+        await ctx.defer()
+        now = datetime.utcnow()
+        sessions = await self.run_db(self._db_active_focus, ctx.guild.id, now)
+        if sessions is None:
+            raise DatabaseUnavailable()
+        
+        if not sessions:
+            await ctx.send("🎯 No active focus sessions right now.", ephemeral=True)
+            return
+        
+        lines = []
+        for user_id, start_time, focus_type in sessions:
+            elapsed = int((now - start_time).total_seconds() / 60)
+            lines.append(f"<@{user_id}> - {focus_type.replace('_', ' ').title()} ({elapsed} min)")
+        
+        embed = discord.Embed(
+            title="🎯 Active Focus Sessions",
+            description="\n".join(lines),
+            color=discord.Color.purple()
+        )
+        await ctx.send(embed=embed)
+
     @focus.command(name="stats", description="View focus statistics")
     @app_commands.describe(user="User to check stats for (optional)")
     async def focus_stats(self, ctx: commands.Context, user: discord.Member = None):
         """View focus statistics"""
-        try:
-            target_user = user or ctx.author
-            
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        # Get productivity stats
-                        cur.execute("""
-                            SELECT total_focus_minutes, focus_sessions_count, total_pomodoros
-                            FROM productivity_stats 
-                            WHERE user_id = %s AND guild_id = %s
-                        """, (target_user.id, ctx.guild.id))
-                        stats = cur.fetchone()
-                        
-                        if not stats:
-                            await ctx.send(f"📊 No focus data found for {target_user.display_name}.", ephemeral=True)
-                            return
-                        
-                        total_focus_minutes, focus_sessions_count, total_pomodoros = stats
-                        
-                        # Get recent focus sessions (last 30 days)
-                        cur.execute("""
-                            SELECT COUNT(*), AVG(duration_minutes), focus_type
-                            FROM focus_sessions 
-                            WHERE user_id = %s AND guild_id = %s 
-                            AND start_time >= %s
-                            GROUP BY focus_type
-                        """, (target_user.id, ctx.guild.id, datetime.utcnow() - timedelta(days=30)))
-                        recent_sessions = cur.fetchall()
-                        
-                        embed = discord.Embed(
-                            title=f"📊 Focus Stats - {target_user.display_name}",
-                            color=discord.Color.purple()
-                        )
-                        
-                        embed.add_field(
-                            name="🎯 Total Focus Time",
-                            value=f"{total_focus_minutes} minutes ({total_focus_minutes // 60}h {total_focus_minutes % 60}m)",
-                            inline=True
-                        )
-                        embed.add_field(
-                            name="📈 Total Sessions",
-                            value=str(focus_sessions_count),
-                            inline=True
-                        )
-                        embed.add_field(
-                            name="🍅 Pomodoros",
-                            value=str(total_pomodoros),
-                            inline=True
-                        )
-                        
-                        if recent_sessions:
-                            recent_text = ""
-                            for count, avg_duration, focus_type in recent_sessions:
-                                recent_text += f"**{focus_type.replace('_', ' ').title()}:** {count} sessions (avg: {avg_duration:.1f}min)\n"
-                            embed.add_field(
-                                name="📅 Recent Activity (30 days)",
-                                value=recent_text,
-                                inline=False
-                            )
-                        
-                        embed.set_thumbnail(url=target_user.avatar.url if target_user.avatar else target_user.default_avatar.url)
-                        await ctx.send(embed=embed)
-                else:
-                    await ctx.send("❌ Database connection unavailable. Please try again later.", ephemeral=True)
-                    
-        except Exception as e:
-            logger.error(f"focus_stats error: {e}")
-            await ctx.send("❌ Failed to get focus stats.", ephemeral=True)
+        target_user = user or ctx.author
+        
+        key = (target_user.id, ctx.guild.id)
+        cached = self.stats_cache.get(key)
+        if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            result = cached[1]
+        else:
+            result = await self.run_db(self._db_focus_stats, target_user.id, ctx.guild.id,
+                                       datetime.utcnow() - timedelta(days=30))
+            if result is None:
+                raise DatabaseUnavailable()
+            self.stats_cache[key] = (time.monotonic(), result)
+        
+        stats, recent_sessions = result
+        # Include increments still waiting for the next flush
+        pending = self.stats_delta.get(key)
+        if pending:
+            total_focus_minutes, focus_sessions_count, total_pomodoros = stats or (0, 0, 0)
+            stats = (total_focus_minutes + pending['total_focus_minutes'],
+                     focus_sessions_count + pending['focus_sessions_count'],
+                     total_pomodoros + pending['total_pomodoros'])
+        if not stats:
+            await ctx.send(f"📊 No focus data found for {target_user.display_name}.", ephemeral=True)
+            return
+        
+        total_focus_minutes, focus_sessions_count, total_pomodoros = stats
+        
+        embed = discord.Embed(
+            title=f"📊 Focus Stats - {target_user.display_name}",
+            color=discord.Color.purple()
+        )
+        
+        embed.add_field(
+            name="🎯 Total Focus Time",
+            value=f"{total_focus_minutes} minutes ({total_focus_minutes // 60}h {total_focus_minutes % 60}m)",
+            inline=True
+        )
+        embed.add_field(
+            name="📈 Total Sessions",
+            value=str(focus_sessions_count),
+            inline=True
+        )
+        embed.add_field(
+            name="🍅 Pomodoros",
+            value=str(total_pomodoros),
+            inline=True
+        )
+        
+        if recent_sessions:
+            recent_text = ""
+            for count, avg_duration, focus_type in recent_sessions:
+                recent_text += f"**{focus_type.replace('_', ' ').title()}:** {count} sessions (avg: {avg_duration:.1f}min)\n"
+            embed.add_field(
+                name="📅 Recent Activity (30 days)",
+                value=recent_text,
+                inline=False
+            )
+        
+        embed.set_thumbnail(url=target_user.display_avatar.url)
+        await ctx.send(embed=embed)
 
     # ===== POMODORO COMMANDS =====
 
     @commands.hybrid_group(name="pomodoro", description="Manage Pomodoro sessions", invoke_without_command=True)
     async def pomodoro(self, ctx: commands.Context):
         """Pomodoro commands help"""
-        embed = discord.Embed(
-            title="🍅 Pomodoro Commands",
-            description=(
-                "**/pomodoro start [duration]** - Start Pomodoro timer (25min default)\n"
-                "**/pomodoro break** - Start break timer\n"
-                "**/pomodoro end** - End current session\n"
-                "**/pomodoro stats** - View Pomodoro statistics"
-            ),
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self.pomodoro_help_embed)
 
     @pomodoro.command(name="start", description="Start Pomodoro timer")
     @app_commands.describe(duration="Pomodoro duration in minutes (default: 25)")
-    async def pomodoro_start(self, ctx: commands.Context, duration: int = 25):
+    async def pomodoro_start(self, ctx: commands.Context, duration: commands.Range[int, 5, 60] = 25):
         """Start Pomodoro session"""
-        try:
-            if ctx.author.id in self.pomodoro_sessions:
-                await ctx.send("❌ You already have an active Pomodoro session! Use `/pomodoro end` to stop it first.", ephemeral=True)
-                return
+        if ctx.author.id in self.pomodoro_sessions:
+            await ctx.send("❌ You already have an active Pomodoro session! Use `/pomodoro end` to stop it first.", ephemeral=True)
+            return
+        
+        start_time = datetime.utcnow()
+        session_id = f"POMO{uuid.uuid4().hex[:12].upper()}"
+        
+        await ctx.defer()
+        if await self.run_db(self._db_insert_pomodoro, session_id, ctx.author.id, ctx.guild.id,
+                             ctx.channel.id, start_time, duration):
+            # Store in memory
+            self.pomodoro_sessions[ctx.author.id] = PomodoroSession(
+                session_id=session_id,
+                start_time=start_time,
+                duration=duration,
+                completed_pomodoros=0,
+                is_break=False,
+                channel_id=ctx.channel.id
+            )
             
-            if duration < 5 or duration > 60:
-                await ctx.send("❌ Pomodoro duration must be between 5 and 60 minutes.", ephemeral=True)
-                return
+            embed = discord.Embed(
+                title="🍅 Pomodoro Started",
+                description=f"**Duration:** {duration} minutes\n**Focus time!** 🎯",
+                color=discord.Color.red()
+            )
+            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
+            embed.set_footer(text=f"Session ID: {session_id}")
             
-            session_id = f"POMO{int(datetime.utcnow().timestamp())}"
-            start_time = datetime.utcnow()
+            await ctx.send(embed=embed)
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO pomodoro_sessions (session_id, user_id, guild_id, channel_id, start_time, duration_minutes)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (session_id, ctx.author.id, ctx.guild.id, ctx.channel.id, start_time, duration))
-                        conn.commit()
-                    
-                    # Store in memory
-                    self.pomodoro_sessions[ctx.author.id] = {
-                        'session_id': session_id,
-                        'start_time': start_time,
-                        'duration': duration,
-                        'completed_pomodoros': 0,
-                        'is_break': False,
-                        'channel_id': ctx.channel.id
-                    }
-                    
-                    embed = discord.Embed(
-                        title="🍅 Pomodoro Started",
-                        description=f"**Duration:** {duration} minutes\n**Focus time!** 🎯",
-                        color=discord.Color.red()
-                    )
-                    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-                    embed.set_footer(text=f"Session ID: {session_id}")
-                    
-                    message = await ctx.send(embed=embed)
-                    
-                    # Set up auto-end after duration
-                    await asyncio.sleep(duration * 60)
-                    
-                    if ctx.author.id in self.pomodoro_sessions:
-                        await self._complete_pomodoro(ctx.author.id, ctx.channel)
-                else:
-                    await ctx.send("❌ Database connection unavailable. Please try again later.", ephemeral=True)
-                    
-        except Exception as e:
-            logger.error(f"pomodoro_start error: {e}")
-            await ctx.send("❌ Failed to start Pomodoro session.", ephemeral=True)
+            # Auto-complete after duration without keeping this command running
+            self.schedule_auto_end('pomodoro', ctx.author.id, ctx.channel.id, duration, self._complete_pomodoro)
+        else:
+            raise DatabaseUnavailable()
 
     @pomodoro.command(name="break", description="Start break timer")
     @app_commands.describe(duration="Break duration in minutes (default: 5)")
-    async def pomodoro_break(self, ctx: commands.Context, duration: int = 5):
+    async def pomodoro_break(self, ctx: commands.Context, duration: commands.Range[int, 1, 60] = 5):
         """Start break timer"""
+        if ctx.author.id not in self.pomodoro_sessions:
+            await ctx.send("❌ No active Pomodoro session found! Start one with `/pomodoro start`.", ephemeral=True)
+            return
+        
+        session_data = self.pomodoro_sessions[ctx.author.id]
+        await ctx.defer()
+        if not await self.run_db(self._db_set_pomodoro_break, session_data.session_id, True, duration):
+            raise DatabaseUnavailable()
+        session_data.is_break = True
+        # A break replaces whatever is left of the running Pomodoro
+        self.cancel_auto_end('pomodoro', ctx.author.id)
+        
+        embed = discord.Embed(
+            title="☕ Break Time!",
+            description=f"**Duration:** {duration} minutes\n**Take a well-deserved break!** ☕",
+            color=discord.Color.blue()
+        )
+        embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
+        
+        await ctx.send(embed=embed)
+        
+        # Announce the end of the break without keeping this command running
+        self.schedule_auto_end('break', ctx.author.id, ctx.channel.id, duration, self._end_break)
+
+    async def _end_break(self, user_id, channel):
+        """Helper method to announce the end of a break"""
         try:
-            if ctx.author.id not in self.pomodoro_sessions:
-                await ctx.send("❌ No active Pomodoro session found! Start one with `/pomodoro start`.", ephemeral=True)
+            session_data = self.pomodoro_sessions.get(user_id)
+            if not session_data or not session_data.is_break:
                 return
             
-            session_data = self.pomodoro_sessions[ctx.author.id]
-            session_data['is_break'] = True
-            session_data['break_duration'] = duration
+            session_data.is_break = False
+            await self.run_db(self._db_set_pomodoro_break, session_data.session_id, False)
             
             embed = discord.Embed(
-                title="☕ Break Time!",
-                description=f"**Duration:** {duration} minutes\n**Take a well-deserved break!** ☕",
-                color=discord.Color.blue()
+                title="🎯 Break Over!",
+                description="**Ready for another Pomodoro?** Use `/pomodoro start` to continue!",
+                color=discord.Color.green()
             )
-            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-            
-            await ctx.send(embed=embed)
+            await channel.send(embed=embed)
+        except Exception as e:
+            logger.error(f"_end_break error: {e}")
+
+    @pomodoro.command(name="end", description="End current Pomodoro session")
+    async def pomodoro_end(self, ctx: commands.Context):
+        """End Pomodoro session"""
+        # Pop first so a timer firing meanwhile finds no session
+        session_data = self.pomodoro_sessions.pop(ctx.author.id, None)
+        if not session_data:
+            await ctx.send("❌ No active Pomodoro session found!", ephemeral=True)
+            return
+        
+        ended = False
+        try:
+            await ctx.defer()
+            ended = await self.run_db(self._db_end_pomodoro, session_data.session_id, datetime.utcnow())
+        finally:
+            if not ended:
+                # Keep the session so the user can retry /pomodoro end, unless a new one replaced it
+                self.pomodoro_sessions.setdefault(ctx.author.id, session_data)
+        if ended:
+            self.cancel_auto_end('pomodoro', ctx.author.id)
+            self.cancel_auto_end('break', ctx.author.id)
             
-            # Set up auto-end after break duration
-            await asyncio.sleep(duration * 60)
+            embed = discord.Embed(
+                title="🍅 Pomodoro Session Ended",
+                description=f"**Completed Pomodoros:** {session_data.completed_pomodoros}",
+                color=discord.Color.orange()
+            )
+            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
+            embed.set_footer(text=f"Session ID: {session_data.session_id}")
             
-            if ctx.author.id in self.pomodoro_sessions and self.pomodoro_sessions[ctx.author.id]['is_break']:
-                embed = discord.Embed(
-                    title="🎯 Break Over!",
-                    description="**Ready for another Pomodoro?** Use `/pomodoro start` to continue!",
-                    color=discord.Color.green()
-                )
-                await ctx.channel.send(embed=embed)
-                
-        except Exception as e:
-            logger.error(f"pomodoro_break error: {e}")
-            await ctx.send("❌ Failed to start break.", ephemeral=True)
+            await ctx.send(embed=embed)
+        else:
+            raise DatabaseUnavailable()
 
     async def _complete_pomodoro(self, user_id, channel):
         """Helper method to complete Pomodoro"""
@@ -432,43 +978,24 @@ class Productivity(commands.Cog):
             if not session_data:
                 return
             
-            session_id = session_data['session_id']
-            completed_pomodoros = session_data['completed_pomodoros'] + 1
+            session_id = session_data.session_id
+            completed_pomodoros = session_data.completed_pomodoros + 1
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            UPDATE pomodoro_sessions 
-                            SET completed_pomodoros = %s, is_break = TRUE
-                            WHERE session_id = %s
-                        """, (completed_pomodoros, session_id))
-                        
-                        # Update productivity stats
-                        cur.execute("""
-                            INSERT INTO productivity_stats (user_id, guild_id, total_pomodoros)
-                            VALUES (%s, %s, 1)
-                            ON CONFLICT (user_id, guild_id) 
-                            DO UPDATE SET 
-                                total_pomodoros = productivity_stats.total_pomodoros + 1,
-                                last_updated = CURRENT_TIMESTAMP
-                        """, (user_id, channel.guild.id))
-                        
-                        conn.commit()
-                    
-                    # Update in memory
-                    self.pomodoro_sessions[user_id]['completed_pomodoros'] = completed_pomodoros
-                    self.pomodoro_sessions[user_id]['is_break'] = True
-                    
-                    user = self.bot.get_user(user_id)
-                    embed = discord.Embed(
-                        title="🍅 Pomodoro Complete!",
-                        description=f"**Completed Pomodoros:** {completed_pomodoros}\n**Time for a break!** ☕",
-                        color=discord.Color.orange()
-                    )
-                    embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.avatar.url if user and user.avatar else None)
-                    
-                    await channel.send(embed=embed)
+            if await self.run_db(self._db_complete_pomodoro, session_id, completed_pomodoros):
+                self.add_stats_delta(user_id, channel.guild.id, total_pomodoros=1)
+                # Update in memory
+                session_data.completed_pomodoros = completed_pomodoros
+                session_data.is_break = True
+                
+                user = self.bot.get_user(user_id)
+                embed = discord.Embed(
+                    title="🍅 Pomodoro Complete!",
+                    description=f"**Completed Pomodoros:** {completed_pomodoros}\n**Time for a break!** ☕",
+                    color=discord.Color.orange()
+                )
+                embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.display_avatar.url if user else None)
+                
+                await channel.send(embed=embed)
         except Exception as e:
             logger.error(f"_complete_pomodoro error: {e}")
 
@@ -477,132 +1004,92 @@ class Productivity(commands.Cog):
     @commands.hybrid_group(name="dnd", description="Do Not Disturb mode", invoke_without_command=True)
     async def dnd(self, ctx: commands.Context):
         """DND commands help"""
-        embed = discord.Embed(
-            title="🔕 Do Not Disturb Commands",
-            description=(
-                "**/dnd start <duration> [reason]** - Enable DND mode\n"
-                "**/dnd end** - Disable DND mode\n"
-                "**/dnd status** - Check your DND status"
-            ),
-            color=discord.Color.dark_gray()
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self.dnd_help_embed)
 
     @dnd.command(name="start", description="Enable Do Not Disturb mode")
     @app_commands.describe(
         duration="DND duration in minutes",
         reason="Reason for DND mode"
     )
-    async def dnd_start(self, ctx: commands.Context, duration: int, *, reason: str = "Focus time"):
+    async def dnd_start(self, ctx: commands.Context, duration: commands.Range[int, 5, 480], *, reason: str = "Focus time"):
         """Set DND mode"""
-        try:
-            if ctx.author.id in self.dnd_users:
-                await ctx.send("❌ You're already in DND mode! Use `/dnd end` to disable it first.", ephemeral=True)
-                return
+        if ctx.author.id in self.dnd_users:
+            await ctx.send("❌ You're already in DND mode! Use `/dnd end` to disable it first.", ephemeral=True)
+            return
+        
+        start_time = datetime.utcnow()
+        end_time = start_time + timedelta(minutes=duration)
+        
+        await ctx.defer()
+        if await self.run_db(self._db_insert_dnd, ctx.author.id, ctx.guild.id, ctx.channel.id,
+                             start_time, end_time, duration, reason):
+            # Store in memory
+            self.dnd_users[ctx.author.id] = DndState(
+                start_time=start_time,
+                end_time=end_time,
+                duration=duration,
+                reason=reason,
+                guild_id=ctx.guild.id
+            )
             
-            if duration < 5 or duration > 480:  # 5 minutes to 8 hours
-                await ctx.send("❌ DND duration must be between 5 and 480 minutes.", ephemeral=True)
-                return
+            embed = discord.Embed(
+                title="🔕 Do Not Disturb Mode",
+                description=f"**Duration:** {duration} minutes\n**Reason:** {reason}",
+                color=discord.Color.dark_gray()
+            )
+            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
+            embed.set_footer(text=f"Ends at {end_time.strftime('%H:%M')}")
             
-            start_time = datetime.utcnow()
-            end_time = start_time + timedelta(minutes=duration)
+            await ctx.send(embed=embed)
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO dnd_status (user_id, guild_id, start_time, end_time, duration_minutes, reason)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (ctx.author.id, ctx.guild.id, start_time, end_time, duration, reason))
-                        conn.commit()
-                    
-                    # Store in memory
-                    self.dnd_users[ctx.author.id] = {
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'duration': duration,
-                        'reason': reason,
-                        'guild_id': ctx.guild.id
-                    }
-                    
-                    embed = discord.Embed(
-                        title="🔕 Do Not Disturb Mode",
-                        description=f"**Duration:** {duration} minutes\n**Reason:** {reason}",
-                        color=discord.Color.dark_gray()
-                    )
-                    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-                    embed.set_footer(text=f"Ends at {end_time.strftime('%H:%M')}")
-                    
-                    await ctx.send(embed=embed)
-                    
-                    # Set up auto-end after duration
-                    await asyncio.sleep(duration * 60)
-                    
-                    if ctx.author.id in self.dnd_users:
-                        await self._end_dnd(ctx.author.id, ctx.channel)
-                else:
-                    await ctx.send("❌ Database connection unavailable. Please try again later.", ephemeral=True)
-                    
-        except Exception as e:
-            logger.error(f"dnd_start error: {e}")
-            await ctx.send("❌ Failed to set DND mode.", ephemeral=True)
+            # Auto-end after duration without keeping this command running
+            self.schedule_auto_end('dnd', ctx.author.id, ctx.channel.id, duration, self._end_dnd)
+        else:
+            raise DatabaseUnavailable()
 
     @dnd.command(name="end", description="Disable Do Not Disturb mode")
     async def dnd_end(self, ctx: commands.Context):
         """End DND mode"""
-        try:
-            if ctx.author.id not in self.dnd_users:
-                await ctx.send("❌ You're not in DND mode!", ephemeral=True)
-                return
-            
-            await self._end_dnd(ctx.author.id, ctx.channel)
-            
-        except Exception as e:
-            logger.error(f"dnd_end error: {e}")
-            await ctx.send("❌ Failed to end DND mode.", ephemeral=True)
+        if ctx.author.id not in self.dnd_users:
+            await ctx.send("❌ You're not in DND mode!", ephemeral=True)
+            return
+        
+        if await self._end_dnd(ctx.author.id, ctx.channel) is False:
+            raise DatabaseUnavailable()
 
     async def _end_dnd(self, user_id, channel):
         """Helper method to end DND"""
         try:
-            dnd_data = self.dnd_users.get(user_id)
+            # Pop first so a concurrent auto-end and /dnd end can't both record it
+            dnd_data = self.dnd_users.pop(user_id, None)
             if not dnd_data:
                 return
             
-            duration = dnd_data['duration']
+            duration = dnd_data.duration
             
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            UPDATE dnd_status 
-                            SET active = FALSE, end_time = %s
-                            WHERE user_id = %s AND guild_id = %s AND active = TRUE
-                        """, (datetime.utcnow(), user_id, dnd_data['guild_id']))
-                        
-                        # Update productivity stats
-                        cur.execute("""
-                            INSERT INTO productivity_stats (user_id, guild_id, total_dnd_minutes)
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (user_id, guild_id) 
-                            DO UPDATE SET 
-                                total_dnd_minutes = productivity_stats.total_dnd_minutes + %s,
-                                last_updated = CURRENT_TIMESTAMP
-                        """, (user_id, dnd_data['guild_id'], duration, duration))
-                        
-                        conn.commit()
-                    
-                    # Remove from memory
-                    del self.dnd_users[user_id]
-                    
-                    user = self.bot.get_user(user_id)
-                    embed = discord.Embed(
-                        title="🔔 DND Mode Ended",
-                        description=f"**Duration:** {duration} minutes\n**Welcome back!** 👋",
-                        color=discord.Color.green()
-                    )
-                    embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.avatar.url if user and user.avatar else None)
-                    
-                    await channel.send(embed=embed)
+            end_time = min(datetime.utcnow(), dnd_data.end_time)
+            ended = False
+            try:
+                ended = await self.run_db(self._db_end_dnd, user_id, dnd_data.guild_id, end_time)
+            finally:
+                if not ended:
+                    # Keep DND active so the user can retry /dnd end
+                    self.restore_session(self.dnd_users, 'dnd', user_id, dnd_data, channel.id, self._end_dnd)
+            if ended:
+                self.cancel_auto_end('dnd', user_id)
+                self.add_stats_delta(user_id, dnd_data.guild_id, total_dnd_minutes=duration)
+                user = self.bot.get_user(user_id)
+                embed = discord.Embed(
+                    title="🔔 DND Mode Ended",
+                    description=f"**Duration:** {duration} minutes\n**Welcome back!** 👋",
+                    color=discord.Color.green()
+                )
+                embed.set_author(name=user.display_name if user else "Unknown", icon_url=user.display_avatar.url if user else None)
+                
+                await channel.send(embed=embed)
+                return True
+            else:
+                return False
         except Exception as e:
             logger.error(f"_end_dnd error: {e}")
 
@@ -4,16 +4,27 @@ from discord import app_commands
 from datetime import datetime, timedelta
 import logging
 from typing import Optional
+import asyncio
+import time
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_CACHE_TTL = 30
+
+# Embeds allow 25 fields / 4096 description chars; 25 lines of ~155 chars fit
+BLOCKERS_LIST_LIMIT = 25
+BLOCKER_DESCRIPTION_PREVIEW = 140
+
 class ProgressTracking(commands.Cog):
     def __init__(self, bot, get_db_connection_func):
         self.bot = bot
         self.get_db_connection = get_db_connection_func
         self.blockers = {}
-        self.blocker_counter = 0
-        self.load_blockers()
+        self.progress_cache = {}  # (helper name, *args) -> (monotonic time, result)
+
+    async def cog_load(self):
+        """Load open blockers off the event loop once the cog is added"""
+        await self.run_db(self.load_blockers)
 
     def load_blockers(self):
         try:
@@ -23,30 +34,118 @@ class ProgressTracking(commands.Cog):
                         cur.execute("SELECT blocker_id, description FROM blockers WHERE resolved = FALSE")
                         rows = cur.fetchall()
                         self.blockers = {row[0]: {'description': row[1], 'resolved': False} for row in rows}
-                        self.blocker_counter = max([int(bid[1:]) for bid in self.blockers.keys()], default=0)
             logger.info(f"✅ Loaded {len(self.blockers)} active blockers")
         except Exception as e:
             logger.error(f"❌ Failed to load blockers: {e}")
 
+    async def run_db(self, fn, *args):
+        """Run a blocking psycopg2 helper in a worker thread so the gateway keeps running"""
+        return await asyncio.to_thread(fn, *args)
+
+    async def cached_query(self, fn, *args):
+        """Run a read helper, reusing results younger than PROGRESS_CACHE_TTL"""
+        key = (fn.__name__, *args)
+        hit = self.progress_cache.get(key)
+        if hit and time.monotonic() - hit[0] < PROGRESS_CACHE_TTL:
+            return hit[1]
+        result = await self.run_db(fn, *args)
+        if result is not None:
+            self.progress_cache[key] = (time.monotonic(), result)
+        return result
+
+    async def progress_summary(self, guild_id, today):
+        """(daily, weekly) guild Done counts, or None when the database is unavailable"""
+        # Keyed per guild and day only, so every member's lookup shares one entry
+        return await self.cached_query(self._db_progress_summary, guild_id, today, today - timedelta(days=7))
+
+    @commands.Cog.listener()
+    async def on_team_task_update(self):
+        """Task writes change the Done counts; drop cached ones"""
+        self.progress_cache.clear()
+
+    # ===== BLOCKING DB HELPERS (run via run_db) =====
+
+    def _db_progress_summary(self, guild_id, today, week_start):
+        """Daily and weekly Done counts in one scan; None when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                # Half-open timestamp ranges instead of created_at::date so the index stays usable
+                tomorrow = today + timedelta(days=1)
+                cur.execute("""
+                    SELECT COUNT(*) FILTER (WHERE created_at >= %s AND created_at < %s),
+                           COUNT(*) FILTER (WHERE created_at >= %s AND created_at < %s)
+                    FROM team_tasks 
+                    WHERE status = 'Done' AND guild_id = %s
+                """, (today, tomorrow, week_start, tomorrow, guild_id))
+                return cur.fetchone()
+
+    def _db_user_done_count(self, guild_id, user_id):
+        """Done tasks assigned to a user in a guild; None when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT COUNT(*) FROM team_tasks
+                    WHERE status = 'Done' AND guild_id = %s AND assignee_id = %s
+                """, (guild_id, user_id))
+                return cur.fetchone()[0]
+
+    def _db_milestone(self, milestone_id):
+        """Return (progress, title), () when not found, or None when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT progress, title FROM milestones WHERE milestone_id = %s
+                """, (milestone_id,))
+                return cur.fetchone() or ()
+
+    def _db_insert_blocker(self, description):
+        """Insert an open blocker and return its ID; None when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return None
+            with conn.cursor() as cur:
+                # The B<n> ID comes from the table's own sequence, so concurrent adds can't collide
+                cur.execute("""
+                    INSERT INTO blockers (id, blocker_id, description, resolved)
+                    SELECT n, 'B' || n, %s, FALSE
+                    FROM nextval(pg_get_serial_sequence('blockers', 'id')) AS n
+                    RETURNING blocker_id
+                """, (description,))
+                blocker_id = cur.fetchone()[0]
+                conn.commit()
+            return blocker_id
+
+    def _db_resolve_blocker(self, blocker_id):
+        """Mark a blocker resolved; returns False when the database is unavailable"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                cur.execute("UPDATE blockers SET resolved = TRUE WHERE blocker_id = %s", (blocker_id,))
+                conn.commit()
+            return True
+
     @commands.hybrid_command(name="progress_daily", description="View today's team progress")
     async def progress_daily(self, ctx: commands.Context):
-        today = datetime.utcnow().date()
+        now = datetime.utcnow()
+        today = now.date()
         try:
-            with self.get_db_connection() as conn:
-                if not conn:
-                    await ctx.send("❌ Database unavailable.")
-                    return
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT COUNT(*) FROM team_tasks 
-                        WHERE status = 'Done' AND created_at::date = %s AND guild_id = %s
-                    """, (today, ctx.guild.id))
-                    tasks_completed = cur.fetchone()[0]
-                    # Additional real data fetch can be added here, e.g., coding time, commits
+            summary = await self.progress_summary(ctx.guild.id, today)
+            if summary is None:
+                await ctx.send("❌ Database unavailable.")
+                return
+            tasks_completed = summary[0]
+            # Additional real data fetch can be added here, e.g., coding time, commits
             embed = discord.Embed(
                 title=f"📈 Daily Team Progress - {today}",
                 color=discord.Color.blue(),
-                timestamp=datetime.utcnow()
+                timestamp=now
             )
             embed.add_field(name="Tasks Completed", value=str(tasks_completed))
             await ctx.send(embed=embed)
@@ -56,23 +155,19 @@ class ProgressTracking(commands.Cog):
 
     @commands.hybrid_command(name="progress_weekly", description="View weekly team progress summary")
     async def progress_weekly(self, ctx: commands.Context):
-        today = datetime.utcnow().date()
+        now = datetime.utcnow()
+        today = now.date()
         week_start = today - timedelta(days=7)
         try:
-            with self.get_db_connection() as conn:
-                if not conn:
-                    await ctx.send("❌ Database unavailable.")
-                    return
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT COUNT(*) FROM team_tasks 
-                        WHERE status = 'Done' AND created_at::date BETWEEN %s AND %s AND guild_id = %s
-                    """, (week_start, today, ctx.guild.id))
-                    tasks_completed = cur.fetchone()[0]
+            summary = await self.progress_summary(ctx.guild.id, today)
+            if summary is None:
+                await ctx.send("❌ Database unavailable.")
+                return
+            tasks_completed = summary[1]
             embed = discord.Embed(
                 title=f"📊 Weekly Team Progress - {week_start} to {today}",
                 color=discord.Color.blue(),
-                timestamp=datetime.utcnow()
+                timestamp=now
             )
             embed.add_field(name="Tasks Completed", value=str(tasks_completed))
             await ctx.send(embed=embed)
@@ -84,15 +179,10 @@ class ProgressTracking(commands.Cog):
     @app_commands.describe(milestone_id="Milestone ID")
     async def progress_milestone(self, ctx: commands.Context, milestone_id: str):
         try:
-            with self.get_db_connection() as conn:
-                if not conn:
-                    await ctx.send("❌ Database unavailable.")
-                    return
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT progress, title FROM milestones WHERE milestone_id = %s
-                    """, (milestone_id,))
-                    row = cur.fetchone()
+            row = await self.run_db(self._db_milestone, milestone_id)
+            if row is None:
+                await ctx.send("❌ Database unavailable.")
+                return
             if not row:
                 await ctx.send(f"❌ Milestone {milestone_id} not found.")
                 return
@@ -112,16 +202,10 @@ class ProgressTracking(commands.Cog):
     async def progress_user(self, ctx: commands.Context, user: Optional[discord.Member] = None):
         target = user or ctx.author
         try:
-            with self.get_db_connection() as conn:
-                if not conn:
-                    await ctx.send("❌ Database unavailable.")
-                    return
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT COUNT(*) FROM team_tasks 
-                        WHERE status = 'Done' AND assignee_id = %s AND guild_id = %s
-                    """, (target.id, ctx.guild.id))
-                    tasks_completed = cur.fetchone()[0]
+            tasks_completed = await self.cached_query(self._db_user_done_count, ctx.guild.id, target.id)
+            if tasks_completed is None:
+                await ctx.send("❌ Database unavailable.")
+                return
             embed = discord.Embed(
                 title=f"👤 Progress for {target.display_name}",
                 color=discord.Color.blue()
@@ -142,17 +226,11 @@ class ProgressTracking(commands.Cog):
     @app_commands.describe(description="Describe the blocker")
     async def blockers_add(self, ctx: commands.Context, *, description: str):
         try:
-            self.blocker_counter += 1
-            blocker_id = f"B{self.blocker_counter}"
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO blockers (blocker_id, description, resolved)
-                            VALUES (%s, %s, FALSE)
-                        """, (blocker_id, description))
-                        conn.commit()
-                    self.blockers[blocker_id] = {'description': description, 'resolved': False}
+            blocker_id = await self.run_db(self._db_insert_blocker, description)
+            if not blocker_id:
+                await ctx.send("❌ Database unavailable.")
+                return
+            self.blockers[blocker_id] = {'description': description, 'resolved': False}
             embed = discord.Embed(
                 title=f"🚧 Blocker {blocker_id} added",
                 description=description,
@@ -168,32 +246,41 @@ class ProgressTracking(commands.Cog):
         if not self.blockers:
             await ctx.send("ℹ️ No active blockers found.")
             return
+        shown = list(self.blockers.items())[:BLOCKERS_LIST_LIMIT]
         embed = discord.Embed(
             title="🚧 Active Blockers",
+            description="\n".join(
+                f"**{blocker_id}**: {data['description'][:BLOCKER_DESCRIPTION_PREVIEW]}"
+                for blocker_id, data in shown
+            ),
             color=discord.Color.orange()
         )
-        for blocker_id, data in self.blockers.items():
-            embed.add_field(name=blocker_id, value=data['description'], inline=False)
+        if len(self.blockers) > BLOCKERS_LIST_LIMIT:
+            embed.set_footer(text=f"Showing {BLOCKERS_LIST_LIMIT} of {len(self.blockers)} blockers")
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(name="blockers_resolve", description="Mark blocker as resolved")
     @app_commands.describe(blocker_id="Blocker ID to resolve")
     async def blockers_resolve(self, ctx: commands.Context, blocker_id: str):
         blocker_id = blocker_id.upper()
-        if blocker_id not in self.blockers:
+        # Claim the blocker before awaiting so a concurrent resolve sees it as gone
+        blocker = self.blockers.pop(blocker_id, None)
+        if blocker is None:
             await ctx.send(f"❌ Blocker {blocker_id} not found.")
             return
+        resolved = False
         try:
-            with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("UPDATE blockers SET resolved = TRUE WHERE blocker_id = %s", (blocker_id,))
-                        conn.commit()
-                    del self.blockers[blocker_id]
+            resolved = await self.run_db(self._db_resolve_blocker, blocker_id)
+            if not resolved:
+                await ctx.send("❌ Database unavailable.")
+                return
             await ctx.send(f"✅ Blocker {blocker_id} marked as resolved.")
         except Exception as e:
             logger.error(f"❌ blockers_resolve command failed: {e}")
             await ctx.send("❌ Failed to resolve blocker.")
+        finally:
+            if not resolved:
+                self.blockers[blocker_id] = blocker
 
 async def setup(bot: commands.Bot):
     get_db_connection_func = getattr(bot, "get_db_connection", None)
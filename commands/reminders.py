@@ -3,25 +3,103 @@ from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timedelta
 import asyncio
+import heapq
 import re
 import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass
 from typing import Optional, Literal
+from psycopg2.extras import execute_values
 
 logger = logging.getLogger(__name__)
 
+IN_TIME_RE = re.compile(r'in (\d+)\s*(minute|min|hour|hr|day|week)s?')
+CLOCK_TIME_RE = re.compile(r'(\d+):?(\d+)?\s*(am|pm)?')
+
+# Reminder changes are written in batches this often
+REMINDER_FLUSH_SECONDS = 5
+
+# Reminder ids reserved from the sequence per round trip
+REMINDER_ID_BLOCK = 20
+
+# Only reminders due within this window are kept in memory; the rest are
+# pulled in by refill_reminders as the window moves forward
+REMINDER_WINDOW = timedelta(hours=6)
+
+# Upper bound on reminder messages in flight at once when a batch fires
+REMINDER_SEND_CONCURRENCY = 10
+
+# Discord caps a message at 10 embeds and 6000 embed characters in total
+REMINDER_EMBEDS_PER_MESSAGE = 10
+REMINDER_EMBED_CHARS_PER_MESSAGE = 6000
+
+REMINDER_FIELDS = ('user_id', 'channel_id', 'target_user_id', 'message', 'trigger_time',
+                   'recurring', 'frequency', 'next_trigger')
+
+REMINDER_UPSERT_SQL = f"""
+    INSERT INTO reminders (reminder_id, {', '.join(REMINDER_FIELDS)})
+    VALUES %s
+    ON CONFLICT (reminder_id) DO UPDATE SET
+        {', '.join(f'{field} = EXCLUDED.{field}' for field in REMINDER_FIELDS)}
+"""
+
+# Row layout matches the Reminder fields, so rows load as Reminder(*row)
+REMINDER_SELECT_SQL = f"SELECT reminder_id, {', '.join(REMINDER_FIELDS)} FROM reminders"
+
+
+@dataclass
+class Reminder:
+    """In-memory state of a pending reminder"""
+    __slots__ = ('id', *REMINDER_FIELDS)
+    id: str
+    user_id: int
+    channel_id: int
+    target_user_id: Optional[int]
+    message: str
+    trigger_time: datetime
+    recurring: bool
+    frequency: Optional[str]
+    next_trigger: Optional[datetime]
+
+
 class Reminders(commands.Cog):
     def __init__(self, bot, get_db_connection_func):
         self.bot = bot
         self.get_db_connection = get_db_connection_func
         self.reminders = {}
-        self.reminder_counter = 0
-        self.init_db_table()
-        self.load_reminders()
-        self.check_reminders.start()
-
-    def cog_unload(self):
-        """Stop the reminder checker when cog is unloaded"""
-        self.check_reminders.cancel()
+        self.reminders_by_user = defaultdict(set)
+        # Ids whose row must be upserted (still in self.reminders) or deleted (gone)
+        self.dirty_reminders = set()
+        self._flushing = set()
+        self._reserved_ids = deque()
+        # Everything due before this is in memory (None until the first load succeeds)
+        self.loaded_until = None
+        # (trigger_time, reminder_id) min-heap; cancelled or rescheduled entries
+        # are left in place and skipped when they reach the top
+        self._heap = []
+        self._wakeup = asyncio.Event()
+        self._scheduler_task = None
+        self._send_slots = asyncio.Semaphore(REMINDER_SEND_CONCURRENCY)
+
+    async def cog_load(self):
+        """Create the table and load reminders off the event loop, then start the scheduler"""
+        await self.run_db(self.init_db_table)
+        await self.run_db(self.load_reminders)
+        self._scheduler_task = asyncio.create_task(self.reminder_scheduler())
+        self.flush_reminders.start()
+        self.refill_reminders.start()
+
+    async def cog_unload(self):
+        """Stop the reminder scheduler and write out pending changes"""
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+        self.flush_reminders.cancel()
+        self.refill_reminders.cancel()
+        await self.write_dirty_reminders()
+
+    async def run_db(self, fn, *args):
+        """Run a blocking psycopg2 helper in a worker thread so the gateway keeps running"""
+        return await asyncio.to_thread(fn, *args)
 
     def init_db_table(self):
         """Initialize the reminders table if it doesn't exist"""
@@ -44,96 +122,204 @@ class Reminders(commands.Cog):
                                 next_trigger TIMESTAMP
                             )
                         """)
+                        cur.execute("CREATE INDEX IF NOT EXISTS idx_reminders_trigger ON reminders (trigger_time)")
+                        cur.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user ON reminders (user_id, trigger_time)")
+                        # New R<n> ids come from the id sequence; move it past ids
+                        # handed out by the old in-memory counter, never backwards past
+                        # ids other processes have reserved but not flushed yet
+                        cur.execute(r"""
+                            SELECT setval(pg_get_serial_sequence('reminders', 'id'), GREATEST(
+                                COALESCE(pg_sequence_last_value(pg_get_serial_sequence('reminders', 'id')::regclass), 0),
+                                (SELECT COALESCE(MAX(id), 0) FROM reminders),
+                                (SELECT COALESCE(MAX(substring(reminder_id FROM 2)::bigint), 0)
+                                 FROM reminders WHERE reminder_id ~ '^R[0-9]+$'),
+                                1
+                            ))
+                        """)
                         conn.commit()
                         logger.info("✅ Reminders table initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize reminders table: {e}")
 
     def load_reminders(self):
-        """Load reminders from PostgreSQL into memory"""
+        """Load reminders due within REMINDER_WINDOW from PostgreSQL into memory"""
+        until = datetime.utcnow() + REMINDER_WINDOW
         try:
             with self.get_db_connection() as conn:
                 if conn:
                     with conn.cursor() as cur:
-                        cur.execute("SELECT * FROM reminders ORDER BY trigger_time ASC")
+                        cur.execute(f"{REMINDER_SELECT_SQL} WHERE trigger_time < %s", (until,))
                         rows = cur.fetchall()
                         self.reminders = {}
+                        self.reminders_by_user = defaultdict(set)
                         for row in rows:
-                            reminder_id = row[1]
-                            self.reminders[reminder_id] = {
-                                'id': reminder_id,
-                                'user_id': row[2],
-                                'channel_id': row[3],
-                                'target_user_id': row[4],
-                                'message': row[5],
-                                'trigger_time': row[6],
-                                'created_at': row[7],
-                                'recurring': row[8],
-                                'frequency': row[9],
-                                'next_trigger': row[10]
-                            }
-                            try:
-                                counter = int(reminder_id[1:])
-                                if counter > self.reminder_counter:
-                                    self.reminder_counter = counter
-                            except (ValueError, IndexError):
-                                pass
-                        logger.info(f"✅ Loaded {len(self.reminders)} reminders from PostgreSQL")
+                            reminder = Reminder(*row)
+                            self.reminders[reminder.id] = reminder
+                            self.reminders_by_user[reminder.user_id].add(reminder.id)
+                        self._heap = [(r.trigger_time, rid) for rid, r in self.reminders.items()]
+                        heapq.heapify(self._heap)
+                        self.loaded_until = until
+                        logger.info(f"✅ Loaded {len(self.reminders)} upcoming reminders from PostgreSQL")
         except Exception as e:
             logger.error(f"⚠️ Could not load reminders: {e}")
 
-    def save_reminder(self, reminder_data):
-        """Save or update a single reminder to PostgreSQL"""
+    def _db_reserve_reminder_ids(self, count):
+        """Reserve `count` R<n> ids from the reminders sequence, or None if the database is unavailable"""
         try:
             with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO reminders 
-                            (reminder_id, user_id, channel_id, target_user_id, message, trigger_time, 
-                             recurring, frequency, next_trigger)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (reminder_id) DO UPDATE SET
-                                user_id = EXCLUDED.user_id,
-                                channel_id = EXCLUDED.channel_id,
-                                target_user_id = EXCLUDED.target_user_id,
-                                message = EXCLUDED.message,
-                                trigger_time = EXCLUDED.trigger_time,
-                                recurring = EXCLUDED.recurring,
-                                frequency = EXCLUDED.frequency,
-                                next_trigger = EXCLUDED.next_trigger
-                        """, (
-                            reminder_data['id'],
-                            reminder_data['user_id'],
-                            reminder_data['channel_id'],
-                            reminder_data.get('target_user_id'),
-                            reminder_data['message'],
-                            reminder_data['trigger_time'],
-                            reminder_data.get('recurring', False),
-                            reminder_data.get('frequency'),
-                            reminder_data.get('next_trigger')
-                        ))
-                        conn.commit()
+                if not conn:
+                    return None
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT nextval(pg_get_serial_sequence('reminders', 'id')) FROM generate_series(1, %s)",
+                        (count,)
+                    )
+                    return [f"R{row[0]}" for row in cur.fetchall()]
         except Exception as e:
-            logger.error(f"⚠️ Could not save reminder {reminder_data['id']}: {e}")
+            logger.error(f"⚠️ Could not reserve reminder ids: {e}")
+            return None
 
-    def delete_reminder(self, reminder_id):
-        """Delete a reminder from PostgreSQL"""
+    async def next_reminder_id(self):
+        """Take a reserved reminder id, reserving another block when none are left"""
+        if not self._reserved_ids:
+            self._reserved_ids.extend(await self.run_db(self._db_reserve_reminder_ids, REMINDER_ID_BLOCK) or ())
+        return self._reserved_ids.popleft() if self._reserved_ids else None
+
+    def _db_load_window(self, start, until):
+        """Reminders due in [start, until), or None if the database is unavailable"""
         try:
             with self.get_db_connection() as conn:
-                if conn:
-                    with conn.cursor() as cur:
-                        cur.execute("DELETE FROM reminders WHERE reminder_id = %s", (reminder_id,))
-                        conn.commit()
+                if not conn:
+                    return None
+                with conn.cursor() as cur:
+                    cur.execute(f"{REMINDER_SELECT_SQL} WHERE trigger_time >= %s AND trigger_time < %s", (start, until))
+                    return [Reminder(*row) for row in cur.fetchall()]
         except Exception as e:
-            logger.error(f"⚠️ Could not delete reminder {reminder_id}: {e}")
+            logger.error(f"⚠️ Could not load upcoming reminders: {e}")
+            return None
 
-    def parse_time(self, time_str: str) -> Optional[datetime]:
-        """Parse natural language time into datetime"""
-        now = datetime.utcnow()
+    def _db_get_reminder(self, reminder_id):
+        """A single stored reminder, or None"""
+        try:
+            with self.get_db_connection() as conn:
+                if not conn:
+                    return None
+                with conn.cursor() as cur:
+                    cur.execute(f"{REMINDER_SELECT_SQL} WHERE reminder_id = %s", (reminder_id,))
+                    row = cur.fetchone()
+                    return Reminder(*row) if row else None
+        except Exception as e:
+            logger.error(f"⚠️ Could not fetch reminder {reminder_id}: {e}")
+            return None
+
+    def _db_user_reminders(self, user_id, exclude_ids, limit):
+        """A user's stored reminders other than exclude_ids: (earliest `limit` rows, total count)"""
+        try:
+            with self.get_db_connection() as conn:
+                if not conn:
+                    return None
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        SELECT reminder_id, {', '.join(REMINDER_FIELDS)}, COUNT(*) OVER ()
+                        FROM reminders
+                        WHERE user_id = %s AND reminder_id <> ALL(%s::text[])
+                        ORDER BY trigger_time
+                        LIMIT %s
+                    """, (user_id, exclude_ids, limit))
+                    rows = cur.fetchall()
+                    return [Reminder(*row[:-1]) for row in rows], (rows[0][-1] if rows else 0)
+        except Exception as e:
+            logger.error(f"⚠️ Could not fetch reminders for {user_id}: {e}")
+            return None
+
+    def _db_user_reminder_ids(self, user_id, exclude_ids):
+        """IDs of a user's stored reminders other than exclude_ids, or None"""
+        try:
+            with self.get_db_connection() as conn:
+                if not conn:
+                    return None
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT reminder_id FROM reminders WHERE user_id = %s AND reminder_id <> ALL(%s::text[])",
+                        (user_id, exclude_ids)
+                    )
+                    return [row[0] for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"⚠️ Could not fetch reminders for {user_id}: {e}")
+            return None
+
+    def stored_only_exclusions(self, user_id):
+        """IDs a database lookup must skip: the user's in-memory reminders and unflushed deletes"""
+        pending = self.dirty_reminders | self._flushing
+        return list(self.reminders_by_user.get(user_id, set()) | {rid for rid in pending if rid not in self.reminders})
+
+    def _db_sync_reminders(self, rows, deleted_ids):
+        """Upsert changed reminders and delete removed ones in one transaction"""
+        with self.get_db_connection() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cur:
+                if rows:
+                    execute_values(cur, REMINDER_UPSERT_SQL, rows, page_size=500)
+                if deleted_ids:
+                    cur.execute("DELETE FROM reminders WHERE reminder_id = ANY(%s)", (deleted_ids,))
+                conn.commit()
+            return True
+
+    @tasks.loop(seconds=REMINDER_FLUSH_SECONDS)
+    async def flush_reminders(self):
+        """Periodically write buffered reminder changes"""
+        await self.write_dirty_reminders()
+
+    @flush_reminders.before_loop
+    async def before_flush_reminders(self):
+        """Wait for bot to be ready before starting the reminder flush loop"""
+        await self.bot.wait_until_ready()
+
+    async def write_dirty_reminders(self):
+        """Persist every reminder changed since the last flush"""
+        if not self.dirty_reminders:
+            return
+        pending, self.dirty_reminders = self.dirty_reminders, set()
+        self._flushing = pending
+        rows = [(rid, *(getattr(self.reminders[rid], field) for field in REMINDER_FIELDS))
+                for rid in pending if rid in self.reminders]
+        deleted_ids = [rid for rid in pending if rid not in self.reminders]
+        try:
+            written = await self.run_db(self._db_sync_reminders, rows, deleted_ids)
+        except Exception as e:
+            logger.error(f"⚠️ Could not save reminders: {e}")
+            written = False
+        self._flushing = set()
+        if not written:
+            # Keep them dirty so the next flush retries
+            self.dirty_reminders |= pending
+
+    @tasks.loop(hours=1)
+    async def refill_reminders(self):
+        """Move reminders that have entered REMINDER_WINDOW from PostgreSQL into memory"""
+        until = datetime.utcnow() + REMINDER_WINDOW
+        reminders = await self.run_db(self._db_load_window, self.loaded_until or datetime.min, until)
+        if reminders is None:
+            return
+        pending = self.dirty_reminders | self._flushing
+        for reminder in reminders:
+            # Rows already in memory are newer there; pending ids are being deleted
+            if reminder.id not in self.reminders and reminder.id not in pending:
+                self.track_reminder(reminder)
+        self.loaded_until = until
+
+    @refill_reminders.before_loop
+    async def before_refill_reminders(self):
+        """Wait for bot to be ready before starting the reminder refill loop"""
+        await self.bot.wait_until_ready()
+
+    def parse_time(self, time_str: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Parse natural language time into datetime, relative to now (default: current UTC time)"""
+        now = now or datetime.utcnow()
         time_str = time_str.lower().strip()
 
-        in_pattern = re.match(r'in (\d+)\s*(minute|min|hour|hr|day|week)s?', time_str)
+        in_pattern = IN_TIME_RE.match(time_str)
         if in_pattern:
             amount = int(in_pattern.group(1))
             unit = in_pattern.group(2)
@@ -149,56 +335,42 @@ class Reminders(commands.Cog):
 
         if 'tomorrow' in time_str:
             base_time = now + timedelta(days=1)
-            time_match = re.search(r'(\d+):?(\d+)?\s*(am|pm)?', time_str)
+            time_match = CLOCK_TIME_RE.search(time_str)
             if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2)) if time_match.group(2) else 0
-                period = time_match.group(3)
-                
-                if period == 'pm' and hour != 12:
-                    hour += 12
-                elif period == 'am' and hour == 12:
-                    hour = 0
-                    
-                return base_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            else:
-                return base_time.replace(hour=9, minute=0, second=0, microsecond=0)
+                return self._apply_time(base_time, time_match)
+            return base_time.replace(hour=9, minute=0, second=0, microsecond=0)
 
         if 'today' in time_str:
-            time_match = re.search(r'(\d+):?(\d+)?\s*(am|pm)?', time_str)
+            time_match = CLOCK_TIME_RE.search(time_str)
             if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2)) if time_match.group(2) else 0
-                period = time_match.group(3)
-                
-                if period == 'pm' and hour != 12:
-                    hour += 12
-                elif period == 'am' and hour == 12:
-                    hour = 0
-                    
-                target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                target = self._apply_time(now, time_match)
                 if target < now:
                     return None
                 return target
 
-        time_match = re.match(r'(\d+):?(\d+)?\s*(am|pm)?', time_str)
+        time_match = CLOCK_TIME_RE.match(time_str)
         if time_match:
-            hour = int(time_match.group(1))
-            minute = int(time_match.group(2)) if time_match.group(2) else 0
-            period = time_match.group(3)
-            
-            if period == 'pm' and hour != 12:
-                hour += 12
-            elif period == 'am' and hour == 12:
-                hour = 0
-                
-            target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            target = self._apply_time(now, time_match)
             if target < now:
                 target += timedelta(days=1)
             return target
 
         return None
 
+    @staticmethod
+    def _apply_time(base_time: datetime, match: re.Match) -> datetime:
+        """Set the hour/minute captured by CLOCK_TIME_RE (12h or 24h) on base_time"""
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+        period = match.group(3)
+
+        if period == 'pm' and hour != 12:
+            hour += 12
+        elif period == 'am' and hour == 12:
+            hour = 0
+
+        return base_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
     def get_next_recurring_time(self, frequency: str, base_time: datetime) -> Optional[datetime]:
         """Calculate next trigger time for recurring reminders"""
         if frequency == 'daily':
@@ -209,57 +381,137 @@ class Reminders(commands.Cog):
             return base_time + timedelta(hours=1)
         return None
 
-    @tasks.loop(seconds=30)
-    async def check_reminders(self):
-        """Check and trigger reminders"""
+    def track_reminder(self, reminder):
+        """Hold a stored reminder in memory and queue it with the scheduler"""
+        self.reminders[reminder.id] = reminder
+        self.reminders_by_user[reminder.user_id].add(reminder.id)
+        self.schedule_reminder(reminder)
+
+    def add_reminder(self, reminder):
+        """Track a new reminder and mark it for saving"""
+        self.track_reminder(reminder)
+        self.dirty_reminders.add(reminder.id)
+
+    def remove_reminder(self, reminder_id):
+        """Mark a reminder for deletion, in memory or only stored; returns the in-memory copy, if any"""
+        self.dirty_reminders.add(reminder_id)
+        reminder = self.reminders.pop(reminder_id, None)
+        if reminder is not None:
+            user_ids = self.reminders_by_user.get(reminder.user_id)
+            if user_ids is not None:
+                user_ids.discard(reminder_id)
+                if not user_ids:
+                    del self.reminders_by_user[reminder.user_id]
+        return reminder
+
+    def schedule_reminder(self, reminder):
+        """Queue a reminder at its trigger time and wake the scheduler in case it is now the earliest"""
+        heapq.heappush(self._heap, (reminder.trigger_time, reminder.id))
+        self._wakeup.set()
+
+    async def reminder_scheduler(self):
+        """Sleep until the earliest reminder is due (or a new one is queued) and fire it"""
+        await self.bot.wait_until_ready()
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.fire_due_reminders()
+            except Exception as e:
+                logger.error(f"❌ Reminder scheduler error: {e}")
+
+    async def fire_due_reminders(self):
+        """Send every reminder whose trigger time has passed"""
         now = datetime.utcnow()
-        triggered = []
+        # Bursts (e.g. hourly recurring reminders) often share channels and users
+        users = {}
+
+        def get_user(user_id):
+            if user_id not in users:
+                users[user_id] = self.bot.get_user(user_id)
+            return users[user_id]
+
+        by_channel = defaultdict(list)
+        while self._heap and self._heap[0][0] <= now:
+            trigger_time, reminder_id = heapq.heappop(self._heap)
+            reminder = self.reminders.get(reminder_id)
+            if reminder is None or reminder.trigger_time != trigger_time:
+                continue
+            by_channel[reminder.channel_id].append(reminder)
+
+        # Reminders due in the same channel share messages, up to Discord's
+        # per-message embed count and size limits
+        batches = []
+        for channel_id, reminders in by_channel.items():
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                for reminder in reminders:
+                    self.remove_reminder(reminder.id)
+                continue
+            batch, size = [], 0
+            for reminder in reminders:
+                target_user = get_user(reminder.target_user_id) if reminder.target_user_id else None
+                embed = self._reminder_embed(reminder, target_user, now)
+                if batch and (len(batch) == REMINDER_EMBEDS_PER_MESSAGE or size + len(embed) > REMINDER_EMBED_CHARS_PER_MESSAGE):
+                    batches.append((channel, batch))
+                    batch, size = [], 0
+                batch.append((reminder, get_user(reminder.user_id), embed))
+                size += len(embed)
+            batches.append((channel, batch))
+
+        # Send concurrently (at most REMINDER_SEND_CONCURRENCY at a time); discord.py
+        # still paces each channel's rate limit bucket
+        results = await asyncio.gather(
+            *(self._send_reminders(channel, batch) for channel, batch in batches),
+            return_exceptions=True
+        )
 
-        for reminder_id, reminder in list(self.reminders.items()):
-            if reminder['trigger_time'] <= now:
-                try:
-                    channel = self.bot.get_channel(reminder['channel_id'])
-                    if channel:
-                        user = self.bot.get_user(reminder['user_id'])
-                        
-                        embed = discord.Embed(
-                            title="⏰ Reminder",
-                            description=reminder['message'],
-                            color=discord.Color.blue(),
-                            timestamp=now
-                        )
-                        embed.set_footer(text=f"Reminder ID: {reminder_id}")
-                        
-                        if reminder.get('target_user_id'):
-                            target_user = self.bot.get_user(reminder['target_user_id'])
-                            if target_user:
-                                embed.add_field(name="For", value=target_user.mention, inline=False)
-                        
-                        await channel.send(content=user.mention if user else "", embed=embed)
-                        
-                        if reminder.get('recurring'):
-                            next_time = self.get_next_recurring_time(reminder['frequency'], reminder['trigger_time'])
-                            if next_time:
-                                reminder['trigger_time'] = next_time
-                                reminder['next_trigger'] = next_time
-                                self.save_reminder(reminder)
-                            else:
-                                triggered.append(reminder_id)
-                        else:
-                            triggered.append(reminder_id)
-                except Exception as e:
-                    logger.error(f"❌ Failed to send reminder {reminder_id}: {e}")
-                    triggered.append(reminder_id)
-
-        for rid in triggered:
-            if rid in self.reminders:
-                del self.reminders[rid]
-                self.delete_reminder(rid)
-
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        """Wait for bot to be ready before starting reminder check loop"""
-        await self.bot.wait_until_ready()
+        for (channel, batch), result in zip(batches, results):
+            for reminder, _, _ in batch:
+                reminder_id = reminder.id
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Failed to send reminder {reminder_id}: {result}")
+                elif reminder.recurring and self.reminders.get(reminder_id) is reminder:
+                    next_time = self.get_next_recurring_time(reminder.frequency, reminder.trigger_time)
+                    if next_time:
+                        reminder.trigger_time = next_time
+                        reminder.next_trigger = next_time
+                        heapq.heappush(self._heap, (next_time, reminder_id))
+                        self.dirty_reminders.add(reminder_id)
+                        continue
+                self.remove_reminder(reminder_id)
+
+    def _reminder_embed(self, reminder, target_user, now):
+        """Embed posted when a reminder fires"""
+        embed = discord.Embed(
+            title="⏰ Reminder",
+            description=reminder.message,
+            color=discord.Color.blue(),
+            timestamp=now
+        )
+        embed.set_footer(text=f"Reminder ID: {reminder.id}")
+        
+        if target_user:
+            embed.add_field(name="For", value=target_user.mention, inline=False)
+        
+        return embed
+
+    async def _send_reminders(self, channel, batch):
+        """Post one message mentioning each owner, with one embed per reminder"""
+        mentions = dict.fromkeys(user.mention for _, user, _ in batch if user)
+        async with self._send_slots:
+            await channel.send(content=" ".join(mentions), embeds=[embed for _, _, embed in batch])
 
     @commands.hybrid_group(name="reminder", description="Manage your reminders", invoke_without_command=True)
     async def reminder(self, ctx: commands.Context):
@@ -284,36 +536,35 @@ class Reminders(commands.Cog):
     )
     async def reminder_set(self, ctx: commands.Context, time: str, *, message: str):
         """Set a one-time reminder"""
-        trigger_time = self.parse_time(time)
+        now = datetime.utcnow()
+        trigger_time = self.parse_time(time, now)
         
         if not trigger_time:
             await ctx.send("❌ Could not parse time. Try: `in 30 minutes`, `9am`, `14:30`", ephemeral=True)
             return
 
-        if trigger_time < datetime.utcnow():
+        if trigger_time < now:
             await ctx.send("❌ Cannot set reminder in the past!", ephemeral=True)
             return
 
-        self.reminder_counter += 1
-        reminder_id = f"R{self.reminder_counter}"
-        
-        reminder_data = {
-            'id': reminder_id,
-            'user_id': ctx.author.id,
-            'channel_id': ctx.channel.id,
-            'target_user_id': None,
-            'message': message,
-            'trigger_time': trigger_time,
-            'created_at': datetime.utcnow(),
-            'recurring': False,
-            'frequency': None,
-            'next_trigger': None
-        }
+        reminder_id = await self.next_reminder_id()
+        if not reminder_id:
+            await ctx.send("❌ Database unavailable. Please try again later.", ephemeral=True)
+            return
         
-        self.reminders[reminder_id] = reminder_data
-        self.save_reminder(reminder_data)
+        self.add_reminder(Reminder(
+            id=reminder_id,
+            user_id=ctx.author.id,
+            channel_id=ctx.channel.id,
+            target_user_id=None,
+            message=message,
+            trigger_time=trigger_time,
+            recurring=False,
+            frequency=None,
+            next_trigger=None
+        ))
         
-        time_delta = trigger_time - datetime.utcnow()
+        time_delta = trigger_time - now
         hours = int(time_delta.total_seconds() // 3600)
         minutes = int((time_delta.total_seconds() % 3600) // 60)
         
@@ -332,38 +583,44 @@ class Reminders(commands.Cog):
     async def reminder_list(self, ctx: commands.Context):
         """List active reminders for the user"""
         user_reminders = [
-            r for r in self.reminders.values() 
-            if r['user_id'] == ctx.author.id
+            self.reminders[rid] for rid in self.reminders_by_user.get(ctx.author.id, ())
         ]
+        # Reminders beyond the in-memory window are only in the database
+        stored = await self.run_db(
+            self._db_user_reminders, ctx.author.id, self.stored_only_exclusions(ctx.author.id), 10
+        )
+        stored_reminders, stored_count = stored or ([], 0)
+        total = len(user_reminders) + stored_count
         
-        if not user_reminders:
+        if not total:
             await ctx.send("ℹ️ You have no active reminders.", ephemeral=True)
             return
         
         embed = discord.Embed(
-            title=f"⏰ Your Reminders ({len(user_reminders)})",
+            title=f"⏰ Your Reminders ({total})",
             color=discord.Color.blue()
         )
         
-        user_reminders.sort(key=lambda x: x['trigger_time'])
+        user_reminders = sorted(user_reminders + stored_reminders, key=lambda x: x.trigger_time)
         
+        now = datetime.utcnow()
         for reminder in user_reminders[:10]:
-            time_delta = reminder['trigger_time'] - datetime.utcnow()
+            time_delta = reminder.trigger_time - now
             hours = int(time_delta.total_seconds() // 3600)
             minutes = int((time_delta.total_seconds() % 3600) // 60)
             
             time_str = f"in {hours}h {minutes}m" if hours > 0 else f"in {minutes}m"
-            if reminder.get('recurring'):
-                time_str += f" (🔄 {reminder['frequency']})"
+            if reminder.recurring:
+                time_str += f" (🔄 {reminder.frequency})"
             
             embed.add_field(
-                name=f"{reminder['id']}: {time_str}",
-                value=reminder['message'][:100],
+                name=f"{reminder.id}: {time_str}",
+                value=reminder.message[:100],
                 inline=False
             )
         
-        if len(user_reminders) > 10:
-            embed.set_footer(text=f"Showing 10 of {len(user_reminders)} reminders")
+        if total > 10:
+            embed.set_footer(text=f"Showing 10 of {total} reminders")
         
         await ctx.send(embed=embed)
 
@@ -373,19 +630,19 @@ class Reminders(commands.Cog):
         """Cancel a reminder"""
         reminder_id = reminder_id.upper()
         
-        if reminder_id not in self.reminders:
+        reminder = self.reminders.get(reminder_id)
+        if reminder is None and reminder_id not in self.dirty_reminders | self._flushing:
+            reminder = await self.run_db(self._db_get_reminder, reminder_id)
+        if reminder is None:
             await ctx.send(f"❌ Reminder `{reminder_id}` not found.", ephemeral=True)
             return
         
-        reminder = self.reminders[reminder_id]
-        
-        if reminder['user_id'] != ctx.author.id:
+        if reminder.user_id != ctx.author.id:
             await ctx.send("❌ You can only cancel your own reminders.", ephemeral=True)
             return
         
-        message = reminder['message']
-        del self.reminders[reminder_id]
-        self.delete_reminder(reminder_id)
+        message = reminder.message
+        self.remove_reminder(reminder_id)
         
         embed = discord.Embed(
             title="✅ Reminder Cancelled",
@@ -411,36 +668,35 @@ class Reminders(commands.Cog):
         message: str
     ):
         """Set a recurring reminder"""
-        trigger_time = self.parse_time(time)
+        now = datetime.utcnow()
+        trigger_time = self.parse_time(time, now)
         
         if not trigger_time:
             await ctx.send("❌ Could not parse time. Try: `in 30 minutes`, `9am`, `14:30`", ephemeral=True)
             return
 
-        if trigger_time < datetime.utcnow():
+        if trigger_time < now:
             await ctx.send("❌ Cannot set reminder in the past!", ephemeral=True)
             return
 
-        self.reminder_counter += 1
-        reminder_id = f"R{self.reminder_counter}"
-        
-        reminder_data = {
-            'id': reminder_id,
-            'user_id': ctx.author.id,
-            'channel_id': ctx.channel.id,
-            'target_user_id': None,
-            'message': message,
-            'trigger_time': trigger_time,
-            'created_at': datetime.utcnow(),
-            'recurring': True,
-            'frequency': frequency,
-            'next_trigger': trigger_time
-        }
+        reminder_id = await self.next_reminder_id()
+        if not reminder_id:
+            await ctx.send("❌ Database unavailable. Please try again later.", ephemeral=True)
+            return
         
-        self.reminders[reminder_id] = reminder_data
-        self.save_reminder(reminder_data)
+        self.add_reminder(Reminder(
+            id=reminder_id,
+            user_id=ctx.author.id,
+            channel_id=ctx.channel.id,
+            target_user_id=None,
+            message=message,
+            trigger_time=trigger_time,
+            recurring=True,
+            frequency=frequency,
+            next_trigger=trigger_time
+        ))
         
-        time_delta = trigger_time - datetime.utcnow()
+        time_delta = trigger_time - now
         hours = int(time_delta.total_seconds() // 3600)
         minutes = int((time_delta.total_seconds() % 3600) // 60)
         
@@ -460,10 +716,11 @@ class Reminders(commands.Cog):
     @reminder.command(name="clear", description="Clear all your reminders")
     async def reminder_clear(self, ctx: commands.Context):
         """Clear all reminders for the user"""
-        user_reminders = [
-            rid for rid, r in self.reminders.items() 
-            if r['user_id'] == ctx.author.id
-        ]
+        user_reminders = list(self.reminders_by_user.get(ctx.author.id, ()))
+        stored_ids = await self.run_db(
+            self._db_user_reminder_ids, ctx.author.id, self.stored_only_exclusions(ctx.author.id)
+        )
+        user_reminders += stored_ids or []
         
         if not user_reminders:
             await ctx.send("ℹ️ You have no active reminders.", ephemeral=True)
@@ -484,8 +741,7 @@ class Reminders(commands.Cog):
         
         if view.value:
             for rid in user_reminders:
-                del self.reminders[rid]
-                self.delete_reminder(rid)
+                self.remove_reminder(rid)
             
             await message.edit(
                 embed=discord.Embed(
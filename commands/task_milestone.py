@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
+import asyncio
 from typing import Optional, Literal
 from datetime import datetime
 
@@ -11,7 +12,10 @@ class Tasks(commands.Cog):
     def __init__(self, bot, get_db_connection_func):
         self.bot = bot
         self.get_db_connection = get_db_connection_func
-        self.init_db_tables()
+
+    async def cog_load(self):
+        """Create tables off the event loop once the cog is added"""
+        await asyncio.to_thread(self.init_db_tables)
     
     def validate_db_connection(self):
         """Validate database connection"""
@@ -316,6 +320,7 @@ class Tasks(commands.Cog):
                             UPDATE team_tasks SET assignee_id = %s WHERE task_id = %s
                         """, (user.id, task_id))
                         conn.commit()
+                    self.bot.dispatch("team_task_update")
             
             await ctx.send(f"👤 Task #{task_id} assigned to {user.mention}")
             
@@ -335,6 +340,7 @@ class Tasks(commands.Cog):
                             UPDATE team_tasks SET status = 'Done' WHERE task_id = %s
                         """, (task_id,))
                         conn.commit()
+                    self.bot.dispatch("team_task_update")
             
             await ctx.send(f"✅ Task #{task_id} marked as completed!")
             
@@ -352,6 +358,7 @@ class Tasks(commands.Cog):
                     with conn.cursor() as cur:
                         cur.execute("DELETE FROM team_tasks WHERE task_id = %s", (task_id,))
                         conn.commit()
+                    self.bot.dispatch("team_task_update")
             
             await ctx.send(f"🗑️ Task #{task_id} deleted.")
             
@@ -61,6 +61,13 @@ DEPLOYMENT_URL = os.getenv('DEPLOYMENT_URL', 'https://testing-kronos.onrender.co
 # ============= DATABASE CONNECTION POOL =============
 connection_pool = None
 
+# Pooled connections used within this many seconds skip the SELECT 1 liveness probe
+CONN_PROBE_IDLE_SECONDS = 0.5
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Pool connection that remembers when it was last used successfully"""
+    last_used = 0.0
+
 def init_all_database_tables():
     """Initialize ALL database tables automatically"""
     logger.info("🔧 Initializing database tables...")
@@ -193,6 +200,12 @@ def init_all_database_tables():
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # Progress summaries only read Done tasks per guild by creation date
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_team_tasks_done_guild_created
+                    ON team_tasks (guild_id, created_at) INCLUDE (assignee_id)
+                    WHERE status = 'Done'
+                """)
                 
                 # Personal tasks
                 cur.execute("""
@@ -275,6 +288,7 @@ def init_all_database_tables():
                         start_time TIMESTAMP NOT NULL,
                         end_time TIMESTAMP,
                         duration_minutes INT,
+                        planned_minutes INT,
                         focus_type TEXT DEFAULT 'focus',
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
@@ -304,6 +318,7 @@ def init_all_database_tables():
                         id SERIAL PRIMARY KEY,
                         user_id BIGINT NOT NULL,
                         guild_id BIGINT NOT NULL,
+                        channel_id BIGINT,
                         start_time TIMESTAMP NOT NULL,
                         end_time TIMESTAMP,
                         duration_minutes INT,
@@ -376,6 +391,8 @@ def init_all_database_tables():
                         date_earned TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # /badge_list shows a member's latest badges first
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_user_badges_user_guild_earned ON user_badges (user_id, guild_id, date_earned DESC)")
                 
                 # Challenges
                 cur.execute("""
@@ -389,6 +406,8 @@ def init_all_database_tables():
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # /challenge_list shows a guild's newest challenges first
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_challenges_guild_created ON challenges (guild_id, created_at DESC)")
                 
                 # Completed challenges
                 cur.execute("""
@@ -437,6 +456,8 @@ def init_all_database_tables():
                         UNIQUE(user_id, guild_id)
                     )
                 """)
+                # /status_team shows a guild's most recent statuses first
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_user_status_guild_updated ON user_status (guild_id, updated_at DESC)")
                 
                 # Countdowns (NEW)
                 cur.execute("""
@@ -512,11 +533,13 @@ def init_db_pool():
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            connection_pool = psycopg2.pool.SimpleConnectionPool(
+            # Threaded pool: connections are checked out from Flask threads and cog worker threads
+            connection_pool = psycopg2.pool.ThreadedConnectionPool(
                 1, 10,
                 DATABASE_URL,
                 sslmode='require',
-                connect_timeout=30
+                connect_timeout=30,
+                connection_factory=TimedConnection
             )
             
             logger.info("✅ PostgreSQL connection pool initialized")
@@ -540,9 +563,11 @@ def get_db_connection():
     try:
         if connection_pool:
             conn = connection_pool.getconn()
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
+            if time.monotonic() - conn.last_used > CONN_PROBE_IDLE_SECONDS:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
             yield conn
+            conn.last_used = time.monotonic()
         else:
             yield None
     except Exception as e:
@@ -771,6 +796,9 @@ async def serverinfo(ctx: commands.Context):
 @bot.event
 async def on_command_error(ctx, error):
     """Handle errors"""
+    # Cogs with their own cog_command_error already replied
+    if ctx.cog and ctx.cog.has_error_handler():
+        return
     if isinstance(error, commands.MissingPermissions):
         await ctx.send("❌ No permission", ephemeral=True)
     elif isinstance(error, commands.MissingRequiredArgument):